@@ -7,12 +7,14 @@ import json
 import logging
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Union
+from typing import AsyncIterator, Dict, List, Any, Optional, Union
 from enum import Enum
 import asyncio
 from contextlib import asynccontextmanager
 
-from .deps import execute_query
+from aiomysql.cursors import SSDictCursor
+
+from .deps import execute_query, execute_many, get_pool
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +107,84 @@ class AuditLogger:
                        duration_ms: Optional[int] = None) -> Optional[str]:
         """Log an audit event"""
         
+        row = self._event_row(
+            event_type, action, resource_type, resource_id, resource_path,
+            user_id, user_role, session_id, ip_address, user_agent, request_id,
+            before_state, after_state, metadata, compliance_impact, risk_level,
+            success, error_message, duration_ms
+        )
+        
+        try:
+            await execute_query(self._INSERT_EVENT_SQL, row)
+            
+            logger.debug(f"Logged audit event {row[0]}: {event_type}.{action} on {resource_type}")
+            return row[0]
+            
+        except Exception as e:
+            logger.error(f"Failed to log audit event: {str(e)}")
+            # Don't raise exception to avoid breaking the main application
+            return None
+    
+    async def log_events_batch(self, events: List[Dict[str, Any]]) -> List[str]:
+        """Log several audit events with one multi-row INSERT.
+
+        Each item holds the keyword arguments ``log_event`` accepts.
+        """
+        
+        if not events:
+            return []
+        
+        rows = []
+        try:
+            for event in events:
+                try:
+                    rows.append(self._event_row(**event))
+                except Exception as e:
+                    # A malformed event must not cost the rest of the batch
+                    logger.error(f"Skipping malformed audit event: {str(e)}")
+            
+            if not rows:
+                return []
+            await execute_many(self._INSERT_EVENT_SQL, rows)
+            logger.debug(f"Logged {len(rows)} audit events in one batch")
+            return [row[0] for row in rows]
+            
+        except Exception as e:
+            logger.error(f"Failed to log audit event batch of {len(rows)}: {str(e)}")
+            # Don't raise exception to avoid breaking the main application
+            return []
+    
+    _INSERT_EVENT_SQL = """
+    INSERT INTO audit_events 
+    (event_id, event_type, action, resource_type, resource_id, resource_path,
+     user_id, user_role, session_id, ip_address, user_agent, request_id,
+     before_state, after_state, metadata, compliance_impact, risk_level,
+     success, error_message, duration_ms)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    
+    def _event_row(self,
+                   event_type: EventType,
+                   action: Action,
+                   resource_type: ResourceType,
+                   resource_id: Optional[str] = None,
+                   resource_path: Optional[str] = None,
+                   user_id: Optional[str] = None,
+                   user_role: Optional[str] = None,
+                   session_id: Optional[str] = None,
+                   ip_address: Optional[str] = None,
+                   user_agent: Optional[str] = None,
+                   request_id: Optional[str] = None,
+                   before_state: Optional[Dict[str, Any]] = None,
+                   after_state: Optional[Dict[str, Any]] = None,
+                   metadata: Optional[Dict[str, Any]] = None,
+                   compliance_impact: Optional[Dict[str, Any]] = None,
+                   risk_level: RiskLevel = RiskLevel.NONE,
+                   success: bool = True,
+                   error_message: Optional[str] = None,
+                   duration_ms: Optional[int] = None) -> tuple:
+        """Build the audit_events INSERT parameters, filling gaps from the audit context"""
+        
         event_id = str(uuid.uuid4())
         
         # Merge context with provided values
@@ -127,46 +207,28 @@ class AuditLogger:
         if metadata:
             combined_metadata.update(metadata)
         
-        try:
-            query = """
-            INSERT INTO audit_events 
-            (event_id, event_type, action, resource_type, resource_id, resource_path,
-             user_id, user_role, session_id, ip_address, user_agent, request_id,
-             before_state, after_state, metadata, compliance_impact, risk_level,
-             success, error_message, duration_ms)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            await execute_query(query, (
-                event_id,
-                event_type,
-                action,
-                resource_type,
-                resource_id,
-                resource_path,
-                user_id,
-                user_role,
-                session_id,
-                ip_address,
-                user_agent,
-                request_id,
-                json.dumps(before_state) if before_state else None,
-                json.dumps(after_state) if after_state else None,
-                json.dumps(combined_metadata) if combined_metadata else None,
-                json.dumps(compliance_impact) if compliance_impact else None,
-                risk_level,
-                success,
-                error_message,
-                duration_ms
-            ))
-            
-            logger.debug(f"Logged audit event {event_id}: {event_type}.{action} on {resource_type}")
-            return event_id
-            
-        except Exception as e:
-            logger.error(f"Failed to log audit event: {str(e)}")
-            # Don't raise exception to avoid breaking the main application
-            return None
+        return (
+            event_id,
+            event_type,
+            action,
+            resource_type,
+            resource_id,
+            resource_path,
+            user_id,
+            user_role,
+            session_id,
+            ip_address,
+            user_agent,
+            request_id,
+            json.dumps(before_state) if before_state else None,
+            json.dumps(after_state) if after_state else None,
+            json.dumps(combined_metadata) if combined_metadata else None,
+            json.dumps(compliance_impact) if compliance_impact else None,
+            risk_level,
+            success,
+            error_message,
+            duration_ms
+        )
     
     async def log_user_action(self, action: Action, resource_type: ResourceType, 
                             resource_id: Optional[str] = None, **kwargs) -> Optional[str]:
@@ -229,6 +291,78 @@ class AuditLogger:
                             offset: int = 0) -> List[Dict[str, Any]]:
         """Get filtered audit trail"""
         
+        query, params = self._build_audit_trail_query(
+            event_types, actions, resource_types, user_id,
+            start_date, end_date, risk_levels, limit, offset
+        )
+        
+        result = await execute_query(query, params)
+        
+        return [self._decode_audit_event(row) for row in result or []]
+    
+    async def iter_audit_trail(self,
+                             event_types: Optional[List[EventType]] = None,
+                             actions: Optional[List[Action]] = None,
+                             resource_types: Optional[List[ResourceType]] = None,
+                             user_id: Optional[str] = None,
+                             start_date: Optional[datetime] = None,
+                             end_date: Optional[datetime] = None,
+                             risk_levels: Optional[List[RiskLevel]] = None,
+                             limit: int = 100,
+                             offset: int = 0,
+                             batch_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the filtered audit trail from a server-side cursor.
+        
+        The query runs and the first batch is fetched before this returns, so
+        query and connection errors raise here rather than mid-stream. The
+        returned iterator releases its pool connection when exhausted or closed.
+        """
+        
+        query, params = self._build_audit_trail_query(
+            event_types, actions, resource_types, user_id,
+            start_date, end_date, risk_levels, limit, offset
+        )
+        
+        pool = await get_pool()
+        conn = await pool.acquire()
+        try:
+            cur = await conn.cursor(SSDictCursor)
+            await cur.execute(query, params)
+            first_batch = await cur.fetchmany(batch_size)
+        except BaseException:
+            # A failed or half-read unbuffered query leaves the connection unusable
+            conn.close()
+            pool.release(conn)
+            raise
+        
+        async def _events():
+            try:
+                rows = first_batch
+                while rows:
+                    for row in rows:
+                        yield self._decode_audit_event(row)
+                    rows = await cur.fetchmany(batch_size)
+                await cur.close()
+            finally:
+                if cur.connection is not None:
+                    # Stopped early: drop the connection instead of draining the rest
+                    conn.close()
+                pool.release(conn)
+        
+        return _events()
+    
+    def _build_audit_trail_query(self,
+                                 event_types: Optional[List[EventType]],
+                                 actions: Optional[List[Action]],
+                                 resource_types: Optional[List[ResourceType]],
+                                 user_id: Optional[str],
+                                 start_date: Optional[datetime],
+                                 end_date: Optional[datetime],
+                                 risk_levels: Optional[List[RiskLevel]],
+                                 limit: int,
+                                 offset: int) -> tuple:
+        """Build the audit trail SELECT and its parameters"""
+        
         conditions = []
         params = []
         
@@ -274,29 +408,28 @@ class AuditLogger:
         """
         params.extend([limit, offset])
         
-        result = await execute_query(query, params)
+        return query, params
+    
+    def _decode_audit_event(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse JSON columns and stringify the timestamp of an audit_events row"""
         
-        events = []
-        for row in result or []:
-            event = dict(row)
-            
-            # Parse JSON fields
-            for field in ['before_state', 'after_state', 'metadata', 'compliance_impact']:
-                if event[field]:
-                    try:
-                        event[field] = json.loads(event[field])
-                    except:
-                        event[field] = {}
-                else:
+        event = dict(row)
+        
+        # Parse JSON fields
+        for field in ['before_state', 'after_state', 'metadata', 'compliance_impact']:
+            if event[field]:
+                try:
+                    event[field] = json.loads(event[field])
+                except:
                     event[field] = {}
-            
-            # Convert datetime to string
-            if event['created_at']:
-                event['created_at'] = event['created_at'].isoformat()
-            
-            events.append(event)
+            else:
+                event[field] = {}
+        
+        # Convert datetime to string
+        if event['created_at']:
+            event['created_at'] = event['created_at'].isoformat()
         
-        return events
+        return event
     
     async def generate_compliance_report(self,
                                        report_type: ReportType,
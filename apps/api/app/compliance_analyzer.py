@@ -16,6 +16,8 @@ class ComplianceAnalyzer:
     def __init__(self):
         self.ollama_url = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
         self.model = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
+        # Created on first use so it binds to the running event loop
+        self._http: Optional[httpx.AsyncClient] = None
         
         # Compliance keywords and patterns
         self.compliance_keywords = {
@@ -175,34 +177,47 @@ Provide analysis in this JSON format:
 Focus on specific, actionable findings with evidence from the document."""
 
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.post(
-                    f"{self.ollama_url}/api/chat",
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {"role": "system", "content": "You are a compliance expert. Always respond with valid JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    ai_response = response.json().get("message", {}).get("content", "{}")
-                    try:
-                        # Extract JSON from response
-                        json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
-                        if json_match:
-                            return json.loads(json_match.group())
-                    except json.JSONDecodeError:
-                        pass
+            response = await self._client().post(
+                f"{self.ollama_url}/api/chat",
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": "You are a compliance expert. Always respond with valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "stream": False
+                }
+            )
+            
+            if response.status_code == 200:
+                ai_response = response.json().get("message", {}).get("content", "{}")
+                try:
+                    # Extract JSON from response
+                    json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+                    if json_match:
+                        return json.loads(json_match.group())
+                except json.JSONDecodeError:
+                    pass
         except Exception as e:
             print(f"AI analysis error: {e}")
         
         # Fallback analysis
         return self._fallback_analysis(content, frameworks)
 
+    def _client(self) -> httpx.AsyncClient:
+        """Long-lived client so analyses reuse keep-alive connections to Ollama"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=30,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
     def _fallback_analysis(self, content: str, frameworks: List[Dict]) -> Dict[str, Any]:
         """Fallback rule-based analysis when AI is unavailable"""
         content_lower = content.lower()
@@ -40,6 +40,8 @@ async def get_pool() -> aiomysql.Pool:
             minsize=1,
             maxsize=5,
             autocommit=True,
+            # GROUP_CONCAT defaults to 1 KB; whole documents are assembled with it
+            init_command="SET SESSION group_concat_max_len = 67108864",
         )
     assert _pool is not None
     return _pool
@@ -51,6 +53,37 @@ async def close_pool() -> None:
         await _pool.wait_closed()
         _pool = None
 
+def _log_query(sql: str, params: Sequence[Any] | None, start_time: float, row_count: int) -> None:
+    # Log slow queries (>100ms)
+    execution_time = time.time() - start_time
+    if execution_time > 0.1:
+        logger.warning(
+            f"Slow query ({execution_time:.3f}s): {sql[:100]}...",
+            extra={
+                "execution_time": execution_time,
+                "sql": sql,
+                "params": params,
+                "row_count": row_count
+            }
+        )
+    elif execution_time > 0.05:  # Log medium queries for debugging
+        logger.info(
+            f"Query ({execution_time:.3f}s): {sql[:50]}...",
+            extra={"execution_time": execution_time, "row_count": row_count}
+        )
+
+def _log_query_error(sql: str, params: Sequence[Any] | None, start_time: float, e: Exception) -> None:
+    execution_time = time.time() - start_time
+    logger.error(
+        f"Query failed ({execution_time:.3f}s): {sql[:100]}... - {e}",
+        extra={
+            "execution_time": execution_time,
+            "sql": sql,
+            "params": params,
+            "error": str(e)
+        }
+    )
+
 async def execute(sql: str, params: Sequence[Any] | None = None) -> List[Dict[str, Any]]:
     start_time = time.time()
     pool = await get_pool()
@@ -64,37 +97,58 @@ async def execute(sql: str, params: Sequence[Any] | None = None) -> List[Dict[st
                 except Exception:
                     rows = []
                 
-                # Log slow queries (>100ms)
-                execution_time = time.time() - start_time
-                if execution_time > 0.1:
-                    logger.warning(
-                        f"Slow query ({execution_time:.3f}s): {sql[:100]}...",
-                        extra={
-                            "execution_time": execution_time,
-                            "sql": sql,
-                            "params": params,
-                            "row_count": len(rows) if rows else 0
-                        }
-                    )
-                elif execution_time > 0.05:  # Log medium queries for debugging
-                    logger.info(
-                        f"Query ({execution_time:.3f}s): {sql[:50]}...",
-                        extra={"execution_time": execution_time, "row_count": len(rows) if rows else 0}
-                    )
-                
+                _log_query(sql, params, start_time, len(rows) if rows else 0)
                 return rows
                 
     except Exception as e:
-        execution_time = time.time() - start_time
-        logger.error(
-            f"Query failed ({execution_time:.3f}s): {sql[:100]}... - {e}",
-            extra={
-                "execution_time": execution_time,
-                "sql": sql,
-                "params": params,
-                "error": str(e)
-            }
-        )
+        _log_query_error(sql, params, start_time, e)
+        raise
+
+async def execute_insert(sql: str, params: Sequence[Any] | None = None) -> int:
+    """Run an INSERT and return the new AUTO_INCREMENT id from the same connection."""
+    start_time = time.time()
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params or [])
+                _log_query(sql, params, start_time, cur.rowcount)
+                return cur.lastrowid
+    except Exception as e:
+        _log_query_error(sql, params, start_time, e)
+        raise
+
+async def execute_many(sql: str, params_list: Sequence[Sequence[Any]]) -> int:
+    """Run one statement for many parameter sets in a single call; returns affected rows.
+
+    aiomysql rewrites multi-row ``INSERT ... VALUES`` into one batched statement.
+    """
+    if not params_list:
+        return 0
+    start_time = time.time()
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(sql, params_list)
+                _log_query(sql, params_list, start_time, cur.rowcount)
+                return cur.rowcount
+    except Exception as e:
+        _log_query_error(sql, params_list, start_time, e)
+        raise
+
+async def execute_rowcount(sql: str, params: Sequence[Any] | None = None) -> int:
+    """Run a DML statement and return the number of affected rows."""
+    start_time = time.time()
+    pool = await get_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params or [])
+                _log_query(sql, params, start_time, cur.rowcount)
+                return cur.rowcount
+    except Exception as e:
+        _log_query_error(sql, params, start_time, e)
         raise
 
 # Backward compatibility: older modules import execute_query
@@ -67,6 +67,31 @@ def generate_embedding(text: str, dim: int = 384) -> List[float]:
             # fall back to stub
             pass
 
+    return _stub_embedding(text, dim)
+
+
+def generate_embeddings(texts: List[str], dim: int = 384) -> List[List[float]]:
+    """Batch form of `generate_embedding`: one model call for all texts.
+
+    Each vector is resized and L2-normalized exactly as the single-text version.
+    """
+    if not texts:
+        return []
+    model = _load_model()
+    if model is not None:
+        try:
+            vecs = model.encode(texts, batch_size=32)  # type: ignore[attr-defined]
+            if hasattr(vecs, "tolist"):
+                vecs = vecs.tolist()  # type: ignore[assignment]
+            return [_l2_normalize(_resize_vector(list(vec), dim)) for vec in vecs]
+        except Exception:
+            # fall back to stub
+            pass
+
+    return [_stub_embedding(text, dim) for text in texts]
+
+
+def _stub_embedding(text: str, dim: int) -> List[float]:
     # Fallback deterministic stub (kept for resilience)
     seed = abs(hash(text)) % (10**9)
     base = (seed % 1000) / 1000.0
@@ -1,21 +1,24 @@
 from fastapi import FastAPI, Body, HTTPException, UploadFile, File, Request, APIRouter, Depends, Query, Form
 from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import StreamingResponse
-from starlette.responses import JSONResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
-from .deps import execute
+from decimal import Decimal
+from .deps import execute, execute_many, execute_rowcount, get_pool
 from .deps_serverless import execute_read_optimized, execute_write_primary
 from .embeddings import generate_embedding as embed
+from .embeddings import generate_embeddings as embed_batch
 from .embeddings import is_model_available
 from .compliance_analyzer import compliance_analyzer
 from .workflow_engine import workflow_engine
 from .version_manager import version_manager, UploadType
 from .audit_logger import audit_logger, EventType, Action, ResourceType, RiskLevel, ReportType
-from .recommendation_engine import recommendation_engine, RecommendationType, InteractionType, InteractionDepth
+from .recommendation_engine import recommendation_engine, RecommendationType, InteractionType, InteractionDepth, UserInteraction
 from .auth import (
     authenticate_user, create_access_token, get_current_active_user, 
     require_role, Token, User, ACCESS_TOKEN_EXPIRE_MINUTES, _require_role_legacy,
@@ -32,9 +35,9 @@ from .errors import (
     NotFoundError, ConflictError, DatabaseError, ExternalServiceError,
     api_error_handler, http_error_handler, validation_error_handler, unhandled_error_handler
 )
-from .middleware import RequestIdMiddleware, LoggingMiddleware, SecurityHeadersMiddleware, ValidationMiddleware, RateLimitMiddleware
+from .middleware import LivenessProbeMiddleware, RequestIdMiddleware, LoggingMiddleware, SecurityHeadersMiddleware, ValidationMiddleware, RateLimitMiddleware
 import os
-from typing import cast
+from typing import Any, cast
 from starlette.types import ExceptionHandler
 import httpx
 import dotenv
@@ -47,10 +50,64 @@ try:
     import docx  # type: ignore
 except Exception:
     docx = None  # type: ignore
+try:
+    import ciso8601  # type: ignore
+except Exception:
+    ciso8601 = None  # type: ignore
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except Exception:
+    aioredis = None  # type: ignore
 import io
 import json
+import re
+import asyncio
+import multiprocessing
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import logging
+import orjson
+
+# Naive DB datetimes serialize as plain isoformat() strings, matching the
+# response_model endpoints; the session time zone is not pinned to UTC
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _orjson_default(obj: Any) -> Any:
+    # DECIMAL columns (scores, averages) come back from aiomysql as Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+class AppORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that serializes datetimes natively and coerces Decimals."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=_ORJSON_OPTIONS)
+
+
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+app = FastAPI(default_response_class=AppORJSONResponse)
+
+class _VersionedRoute(APIRoute):
+    """Route that matches both its legacy path and the same path under /api/v1.
+
+    One compiled pattern with the prefix optional, so the core endpoints are
+    registered once instead of twice.
+    """
+
+    def __init__(self, path: str, *args, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        self.path_regex = re.compile("^(?:/api/v1)?" + self.path_regex.pattern[1:])
+
+
+# Core endpoints are served at their legacy paths and under /api/v1
+router = APIRouter(route_class=_VersionedRoute)
 
 # Add middleware in order (outermost to innermost)
 # CORS - restrict origins in production
@@ -77,10 +134,245 @@ app.add_middleware(
 app.add_middleware(LoggingMiddleware)
 app.add_middleware(RequestIdMiddleware)
 app.add_middleware(ValidationMiddleware, max_body_size=int(os.getenv("MAX_BODY_SIZE", str(10 * 1024 * 1024))))
+# Added last so Starlette places it in front of every other middleware
+app.add_middleware(LivenessProbeMiddleware, path="/healthz")
 
 # Ensure .env is loaded for endpoints that don't touch the DB
 dotenv.load_dotenv(str((Path(__file__).parent / ".." / ".env").resolve()))
 
+
+# Long-lived HTTP client for all outbound calls (Ollama, Slack, probes) so they
+# reuse pooled keep-alive connections; callers pass their own per-request timeout
+@app.on_event("startup")
+async def _open_http_client() -> None:
+    app.state.http = httpx.AsyncClient(
+        timeout=5,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+
+
+async def _warm_ollama_connection() -> None:
+    # Resolve and connect once so the first probe after a deploy reuses a pooled socket
+    try:
+        await app.state.http.head(_ollama_url() + "/", timeout=2.0)
+    except Exception:
+        pass
+
+
+@app.on_event("startup")
+async def _start_ollama_warmup() -> None:
+    app.state.ollama_warmup = asyncio.create_task(_warm_ollama_connection())
+
+
+# Registered before _close_http_client so the warmup never outlives the client it uses
+@app.on_event("shutdown")
+async def _stop_ollama_warmup() -> None:
+    warmup = app.state.ollama_warmup
+    warmup.cancel()
+    try:
+        await warmup
+    except asyncio.CancelledError:
+        pass
+
+
+@app.on_event("shutdown")
+async def _close_http_client() -> None:
+    await app.state.http.aclose()
+    await compliance_analyzer.aclose()
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+async def _post_json(url: str, payload: dict, timeout: float) -> httpx.Response:
+    """POST ``payload`` encoded with orjson on the shared client (httpx's json= uses stdlib json)."""
+    return await app.state.http.post(url, content=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=timeout)
+
+
+# Optional shared result cache; endpoints fall back to the DB when it is unset
+@app.on_event("startup")
+async def _open_redis() -> None:
+    redis_url = os.getenv("REDIS_URL")
+    app.state.redis = aioredis.from_url(redis_url) if redis_url and aioredis else None
+
+
+@app.on_event("shutdown")
+async def _close_redis() -> None:
+    if app.state.redis is not None:
+        await app.state.redis.close()
+
+
+# Queued by the shutdown hook; a worker writes what it holds and exits when it sees it
+_QUEUE_STOP = object()
+
+
+async def _drain_batch(queue: asyncio.Queue, max_items: int, max_wait: float) -> list:
+    """Wait for one item, then keep collecting until ``max_items``, ``max_wait`` seconds or the stop marker."""
+    batch = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    while len(batch) < max_items and batch[-1] is not _QUEUE_STOP:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+def _drain_nowait(queue: asyncio.Queue) -> list:
+    batch = []
+    while not queue.empty():
+        item = queue.get_nowait()
+        if item is not _QUEUE_STOP:
+            batch.append(item)
+    return batch
+
+
+async def _audit_worker(queue: asyncio.Queue) -> None:
+    # Audit writes off the request path, flushed as multi-row INSERTs
+    while True:
+        batch = await _drain_batch(queue, max_items=100, max_wait=0.05)
+        stopping = batch[-1] is _QUEUE_STOP
+        if stopping:
+            batch.pop()
+        try:
+            await audit_logger.log_events_batch(batch)
+        except Exception:
+            logger.exception("Failed to store %d audit events", len(batch))
+        if stopping:
+            return
+
+
+async def _interaction_worker(queue: asyncio.Queue) -> None:
+    while True:
+        batch = await _drain_batch(queue, max_items=256, max_wait=0.05)
+        stopping = batch[-1] is _QUEUE_STOP
+        if stopping:
+            batch.pop()
+        try:
+            await recommendation_engine.track_interactions_bulk(batch)
+        except Exception:
+            logger.exception("Failed to store %d interactions", len(batch))
+        if stopping:
+            return
+
+
+def _enqueue_audit_event(**event) -> None:
+    try:
+        app.state.audit_queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning("Audit queue full; dropping audit event")
+
+
+async def _warm_recommendation_profiles() -> None:
+    try:
+        warmed = await recommendation_engine.warm_user_profiles()
+        logger.info("Warmed %d recommendation user profiles", warmed)
+    except Exception:
+        logger.exception("Recommendation profile warmup failed")
+
+
+@app.on_event("startup")
+async def _start_profile_warmup() -> None:
+    # Runs in the background so startup is not held up by the DB
+    app.state.profile_warmup = asyncio.create_task(_warm_recommendation_profiles())
+
+
+@app.on_event("shutdown")
+async def _stop_profile_warmup() -> None:
+    # The warmup can still be walking users; stop it before the DB pool goes away
+    warmup = app.state.profile_warmup
+    warmup.cancel()
+    try:
+        await warmup
+    except asyncio.CancelledError:
+        pass
+
+
+@app.on_event("startup")
+async def _start_audit_worker() -> None:
+    app.state.audit_queue = asyncio.Queue(maxsize=10_000)
+    app.state.audit_worker = asyncio.create_task(_audit_worker(app.state.audit_queue))
+    app.state.interaction_queue = asyncio.Queue(maxsize=10_000)
+    app.state.interaction_worker = asyncio.create_task(
+        _interaction_worker(app.state.interaction_queue)
+    )
+
+
+@app.on_event("shutdown")
+async def _stop_audit_worker() -> None:
+    # Let each worker write its in-flight batch and everything queued ahead of the
+    # stop marker; cancel only if the database stops it finishing in time
+    workers = ((app.state.audit_queue, app.state.audit_worker),
+               (app.state.interaction_queue, app.state.interaction_worker))
+    for queue, worker in workers:
+        if not worker.done():
+            await queue.put(_QUEUE_STOP)
+    for queue, worker in workers:
+        try:
+            await asyncio.wait_for(worker, timeout=10)
+        except Exception:
+            logger.exception("Background writer did not stop cleanly")
+    # Flush whatever was queued after the stop marker
+    try:
+        await audit_logger.log_events_batch(_drain_nowait(app.state.audit_queue))
+    except Exception:
+        logger.exception("Failed to flush audit events on shutdown")
+    try:
+        await recommendation_engine.track_interactions_bulk(
+            _drain_nowait(app.state.interaction_queue)
+        )
+    except Exception:
+        logger.exception("Failed to flush interactions on shutdown")
+
+
+# PyPDF2 is pure Python, so page extraction runs in worker processes to keep it
+# off the event loop and out from under the GIL. Workers are spawned rather than
+# forked: forking a process with torch and the event loop's threads loaded can
+# deadlock the children, and spawned workers only import app.pdf_text.
+@app.on_event("startup")
+async def _start_pdf_pool() -> None:
+    app.state.pdf_pool = ProcessPoolExecutor(
+        max_workers=min(4, os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@app.on_event("shutdown")
+async def _stop_pdf_pool() -> None:
+    app.state.pdf_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _spool_to_named_file(src) -> str:
+    """Copy an upload's spooled file to a named temp file a worker process can open."""
+    src.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as dst:
+        shutil.copyfileobj(src, dst)
+    return dst.name
+
+
+@lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO-8601 query/body date; clients tend to resend the same ranges."""
+    if ciso8601 is not None:
+        return ciso8601.parse_datetime(value)
+    return datetime.fromisoformat(value)
+
+
+def _loads(raw, default=None):
+    """Decode a JSON column with orjson; empty values map to ``default`` (``{}`` if unset)."""
+    if not raw:
+        return {} if default is None else default
+    return orjson.loads(raw)
+
+
+def _vec_literal(vec) -> str:
+    """Format an embedding as the ``[x,y,...]`` text that ``CAST(... AS VECTOR)`` expects."""
+    return orjson.dumps(vec, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
 class RegIn(BaseModel):
     source: str
     title: str
@@ -241,17 +533,18 @@ async def _send_slack_notification(text: str) -> bool:
     if not webhook:
         return False
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            await client.post(webhook, json={"text": text})
+        await _post_json(webhook, {"text": text}, 10.0)
         return True
     except Exception:
         return False
 
+_WORD_RE = re.compile(r"\w+")
+
+
 async def _simple_search_sources(query: str, limit: int = 5) -> list[dict]:
     """Token-based LIKE search that matches any relevant word (>=3 chars)."""
     try:
-        import re as _re
-        terms = [t.lower() for t in _re.findall(r"\w+", query) if len(t) >= 3][:5]
+        terms = [t.lower() for t in _WORD_RE.findall(query) if len(t) >= 3][:5]
         if not terms:
             terms = [query.strip()]
 
@@ -326,12 +619,11 @@ async def _generate_fast_answer(query: str, sources: list[dict]) -> str | None:
         "options": {"temperature": 0.2, "num_predict": 160},
     }
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            r = await client.post(f"{ollama}/api/generate", json=payload)
-            if r.status_code == 200:
-                data = r.json()
-                ans = (data.get("response") or "").strip()
-                return ans or None
+        r = await _post_json(f"{ollama}/api/generate", payload, 20.0)
+        if r.status_code == 200:
+            data = r.json()
+            ans = (data.get("response") or "").strip()
+            return ans or None
     except Exception:
         return None
     return None
@@ -611,6 +903,7 @@ async def ingest_doc_v1(item: DocIn, current_user: User = Depends(get_current_ac
             """,
             (item.path, item.chunk_idx, item.content, item.display_name, item.section, ",".join(item.tags) if item.tags else None),
         )
+        await _record_doc_chunks(item.path, 1)
         return {"ok": True}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -633,7 +926,7 @@ class RecentDocOut(BaseModel):
     id: str | int
     name: str
     type: str
-    uploadedAt: str | None = None
+    uploadedAt: datetime | None = None
     path: str | None = None
     source: str | None = None
 
@@ -642,8 +935,8 @@ class DocumentItemOut(BaseModel):
     display_name: str
     description: str | None = None
     resolved: bool
-    first_seen: str | None = None
-    last_seen: str | None = None
+    first_seen: datetime | None = None
+    last_seen: datetime | None = None
     chunks: int
     type: str
 
@@ -743,16 +1036,16 @@ class RecommendationsResponse(BaseModel):
 
 class InteractionTrackingIn(BaseModel):
     document_id: int
-    interaction_type: str  # view, download, search, bookmark, share, analyze, comment
+    interaction_type: InteractionType
     duration_seconds: int | None = None
-    depth: str = "browse"  # quick_view, browse, detailed_review, analysis
+    depth: InteractionDepth = InteractionDepth.BROWSE
     session_id: str | None = None
     referrer_source: str | None = None
     metadata: dict = {}
 
 class RecommendationFeedbackIn(BaseModel):
     recommendation_id: str
-    rating: int  # 1-5 stars
+    rating: int = Field(ge=1, le=5)  # 1-5 stars
     notes: str | None = None
 
 class UserPreferencesIn(BaseModel):
@@ -765,6 +1058,9 @@ class UserPreferencesIn(BaseModel):
     enable_trend_based: bool = True
     enable_collaborative_filtering: bool = True
 
+class UserPreferencesBulkItemIn(UserPreferencesIn):
+    user_id: str
+
 class UserPreferencesOut(BaseModel):
     user_id: str
     preferred_recommendation_types: list[str]
@@ -785,7 +1081,7 @@ class RecommendationAnalyticsOut(BaseModel):
     user_engagement_metrics: dict
 
 # Authentication endpoints
-@app.post("/auth/login", response_model=Token)
+@router.post("/auth/login", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     user = await authenticate_user(form_data.username.strip(), form_data.password.strip())
     if user is None:
@@ -800,12 +1096,12 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.get("/auth/me", response_model=User)
+@router.get("/auth/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 # User management endpoints
-@app.post("/auth/register", response_model=User)
+@router.post("/auth/register", response_model=User)
 async def register_user(user_data: UserCreateIn, current_user: User = Depends(require_role(["admin"]))):
     # Check if username already exists
     existing = await execute("SELECT id FROM users WHERE username = %s", [user_data.username])
@@ -840,7 +1136,7 @@ async def register_user(user_data: UserCreateIn, current_user: User = Depends(re
         is_active=True
     )
 
-@app.get("/auth/users", response_model=list[User])
+@router.get("/auth/users", response_model=list[User])
 async def list_users(current_user: User = Depends(require_role(["admin"]))):
     sql = "SELECT username, email, role, is_active, created_at FROM users ORDER BY created_at DESC"
     rows = await execute(sql, [])
@@ -854,7 +1150,7 @@ async def list_users(current_user: User = Depends(require_role(["admin"]))):
         for row in rows or []
     ]
 
-@app.patch("/auth/users/{username}", response_model=User)
+@router.patch("/auth/users/{username}", response_model=User)
 async def update_user(username: str, user_data: UserUpdateIn, current_user: User = Depends(require_role(["admin"]))):
     # Check if user exists
     existing = await execute("SELECT id FROM users WHERE username = %s", [username])
@@ -895,7 +1191,7 @@ async def update_user(username: str, user_data: UserUpdateIn, current_user: User
         is_active=row["is_active"]
     )
 
-@app.delete("/auth/users/{username}", response_model=OkOut)
+@router.delete("/auth/users/{username}", response_model=OkOut)
 async def delete_user(username: str, current_user: User = Depends(require_role(["admin"]))):
     if username == current_user.username:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
@@ -906,7 +1202,7 @@ async def delete_user(username: str, current_user: User = Depends(require_role([
     
     return {"ok": True}
 
-@app.patch("/auth/password", response_model=OkOut)
+@router.patch("/auth/password", response_model=OkOut)
 async def update_password(password_data: UserPasswordUpdateIn, current_user: User = Depends(get_current_active_user)):
     from .auth import get_user, verify_password
     
@@ -922,52 +1218,80 @@ async def update_password(password_data: UserPasswordUpdateIn, current_user: Use
     
     return {"ok": True}
 
-@app.post("/ingest/reg", response_model=OkOut)
+@router.post("/ingest/reg", response_model=OkOut)
 async def ingest_reg(item: RegIn):
     vec = embed(item.text)
-    vec_str = "[" + ",".join(str(x) for x in vec) + "]"
+    vec_str = _vec_literal(vec)
     sql = """
     INSERT INTO reg_texts(source,title,section,text,embedding) VALUES(%s,%s,%s,%s,CAST(%s AS VECTOR(384)))
     """
     await execute(sql, [item.source, item.title, item.section, item.text, vec_str])
     return {"ok": True}
 
-@app.post("/ingest/doc", response_model=OkOut)
+@router.post("/ingest/doc", response_model=OkOut)
 async def ingest_doc(item: DocIn):
     vec = embed(item.content)
-    vec_str = "[" + ",".join(str(x) for x in vec) + "]"
+    vec_str = _vec_literal(vec)
     sql = """
     INSERT INTO corp_docs(path,chunk_idx,content,embedding) VALUES(%s,%s,%s,CAST(%s AS VECTOR(384)))
     """
     await execute(sql, [item.path, item.chunk_idx, item.content, vec_str])
+    await _record_doc_chunks(item.path, 1)
     return {"ok": True}
 
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[\.!\?])\s+")
+_FILENAME_SANITIZE = re.compile(r'[^a-zA-Z0-9\s]')
+
+
+async def _record_doc_chunks(path: str, count: int) -> None:
+    """Keep documents_meta's chunk count and first/last-seen times in step with corp_docs inserts."""
+    await execute(
+        """
+        INSERT INTO documents_meta (path, chunks, first_seen, last_seen) VALUES (%s, %s, NOW(), NOW())
+        ON DUPLICATE KEY UPDATE
+            chunks = chunks + VALUES(chunks),
+            first_seen = COALESCE(first_seen, VALUES(first_seen)),
+            last_seen = VALUES(last_seen)
+        """,
+        [path, count],
+    )
+
+
 def _split_semantic_chunks(text: str, target: int = 1000, overlap: int = 120) -> list[str]:
-    import re
     if not text.strip():
         return []
-    sentences = re.split(r"(?<=[\.!\?])\s+", text.strip())
     chunks: list[str] = []
-    current = ""
-    for s in sentences:
+    # Sentences of the chunk being built; ``size`` is len(" ".join(parts))
+    parts: list[str] = []
+    size = 0
+    for s in _SENTENCE_BOUNDARY_RE.split(text.strip()):
         s = s.strip()
         if not s:
             continue
-        if len(current) + len(s) + (1 if current else 0) <= target:
-            current = (current + " " + s).strip() if current else s
-        else:
-            if current:
-                chunks.append(current)
-                if overlap > 0 and len(current) > overlap:
-                    tail = current[-overlap:]
-                    current = (tail + " " + s).strip()
-                else:
-                    current = s
+        if size + len(s) + (1 if parts else 0) <= target:
+            if parts:
+                parts.append(s)
+                size += len(s) + 1
+                # A carried-over tail may start mid-whitespace; the chunk never does
+                head = parts[0].lstrip()
+                size -= len(parts[0]) - len(head)
+                parts[0] = head
             else:
-                chunks.append(s[:target])
-                current = s[max(0, len(s) - overlap):]
-    if current:
-        chunks.append(current)
+                parts = [s]
+                size = len(s)
+        elif parts:
+            current = " ".join(parts)
+            chunks.append(current)
+            tail = current[-overlap:].lstrip() if overlap > 0 and len(current) > overlap else ""
+            parts = [tail, s] if tail else [s]
+            size = len(tail) + 1 + len(s) if tail else len(s)
+        else:
+            chunks.append(s[:target])
+            carry = s[max(0, len(s) - overlap):]
+            parts = [carry] if carry else []
+            size = len(carry)
+    if parts:
+        chunks.append(" ".join(parts))
     return chunks
 
 @app.post("/ingest/docx", response_model=OkOut)
@@ -995,7 +1319,7 @@ async def ingest_docx(
             raise HTTPException(status_code=400, detail="Could not extract text from DOCX")
         if doc_type == "reg":
             rvec = embed(text_content)
-            rvec_str = "[" + ",".join(str(x) for x in rvec) + "]"
+            rvec_str = _vec_literal(rvec)
             await execute(
                 "INSERT INTO reg_texts(source,title,section,text,display_name,tags,embedding) VALUES(%s,%s,%s,%s,%s,%s,CAST(%s AS VECTOR(384)))",
                 ["uploaded", display_name or file.filename, section or file.filename.replace('.docx',''), text_content, display_name or file.filename, tags, rvec_str]
@@ -1008,13 +1332,14 @@ async def ingest_docx(
                     "INSERT INTO corp_docs(path, chunk_idx, content, display_name, section, tags) VALUES(%s,%s,%s,%s,%s,%s)",
                     [file.filename, i, chunk, display_name, section, ",".join([t.strip() for t in tag_list if t.strip()]) or None]
                 )
+            await _record_doc_chunks(file.filename, len(chunks))
         return {"ok": True}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/ingest/pdf", response_model=OkOut)
+@router.post("/ingest/pdf", response_model=OkOut)
 async def ingest_pdf(
     file: UploadFile = File(...),
     doc_type: str = Form(...),  # "reg" or "doc"
@@ -1026,14 +1351,16 @@ async def ingest_pdf(
         raise HTTPException(status_code=500, detail="PyPDF2 is not installed on the server")
     
     try:
-        # Read PDF content
-        pdf_content = await file.read()
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-        
-        # Extract text from all pages
-        text_content = ""
-        for page in pdf_reader.pages:
-            text_content += page.extract_text() + "\n"
+        from .pdf_text import extract_pdf_text
+
+        # Extract text from all pages in the PDF worker pool. The upload is copied
+        # to disk in chunks and opened by path, never read into memory whole.
+        pdf_path = await asyncio.to_thread(_spool_to_named_file, file.file)
+        try:
+            loop = asyncio.get_running_loop()
+            text_content = await loop.run_in_executor(app.state.pdf_pool, extract_pdf_text, pdf_path)
+        finally:
+            os.unlink(pdf_path)
         
         if not text_content.strip():
             raise HTTPException(status_code=400, detail="Could not extract text from PDF")
@@ -1041,12 +1368,11 @@ async def ingest_pdf(
         # Determine if it's regulation or document
         if doc_type == "reg":
             # Extract section from filename
-            import re
-            section = re.sub(r'[^a-zA-Z0-9\s]', ' ', file.filename.replace('.pdf', ''))
+            section = _FILENAME_SANITIZE.sub(' ', file.filename.removesuffix('.pdf'))
             
             # Ingest as regulation with embedding
             rvec = embed(text_content)
-            rvec_str = "[" + ",".join(str(x) for x in rvec) + "]"
+            rvec_str = _vec_literal(rvec)
             await execute(
                 "INSERT INTO reg_texts(source,title,section,text,embedding) VALUES(%s,%s,%s,%s,CAST(%s AS VECTOR(384)))",
                 ["uploaded", file.filename, section, text_content, rvec_str]
@@ -1054,138 +1380,146 @@ async def ingest_pdf(
         else:
             # Semantic chunking for documents
             chunks = _split_semantic_chunks(text_content, target=1000, overlap=120)
-            for i, chunk in enumerate(chunks):
-                vec = embed(chunk)
-                vec_str = "[" + ",".join(str(x) for x in vec) + "]"
-                
+            # One batched model call, off the event loop
+            vecs = await asyncio.to_thread(embed_batch, chunks)
+            if chunks:
+                # Single multi-row INSERT; executemany can't batch rows that contain CAST(...)
+                values_sql = ",".join(["(%s,%s,%s,CAST(%s AS VECTOR(384)))"] * len(chunks))
+                params: list[Any] = []
+                for i, (chunk, vec) in enumerate(zip(chunks, vecs)):
+                    params.extend((file.filename, i, chunk, _vec_literal(vec)))
                 await execute(
-                    "INSERT INTO corp_docs(path,chunk_idx,content,embedding) VALUES(%s,%s,%s,CAST(%s AS VECTOR(384)))",
-                    [file.filename, i, chunk, vec_str]
+                    f"INSERT INTO corp_docs(path,chunk_idx,content,embedding) VALUES {values_sql}",
+                    params
                 )
+                await _record_doc_chunks(file.filename, len(chunks))
         return {"ok": True}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
-@app.post("/query/hybrid", response_model=HybridResponseOut)
-async def query_hybrid(inp: HybridIn):
-    fts_sql = """
-    SELECT id, section, text,
-           COALESCE((LENGTH(LOWER(text)) - LENGTH(REPLACE(LOWER(text), LOWER(%s), ''))) / NULLIF(LENGTH(%s),0), 0) AS fts_score
-    FROM reg_texts
-    ORDER BY fts_score DESC
-    LIMIT %s
-    """
-    fts_rows = await execute(fts_sql, [inp.query, inp.query, inp.top_k])
+@lru_cache(maxsize=4096)
+def _query_vec_literal(query: str) -> str:
+    """Embedding literal for a search query; repeated queries skip the model call.
 
-    qvec = embed(inp.query)
-    qvec_str = "[" + ",".join(str(x) for x in qvec) + "]"
-    vec_sql = """
-    SELECT id, content,
-           VEC_COSINE_DISTANCE(embedding, CAST(%s AS VECTOR(384))) AS vec_score
-    FROM corp_docs
-    ORDER BY vec_score ASC
-    LIMIT %s
+    Ingest paths call ``embed`` directly, since their texts are rarely repeated.
     """
-    vec_rows = await execute(vec_sql, [qvec_str, inp.top_k])
-
-    f_max = max([r["fts_score"] for r in fts_rows] or [1.0])
-    f_min = min([r["fts_score"] for r in fts_rows] or [0.0])
-    v_max = max([r["vec_score"] for r in vec_rows] or [1.0])
-    v_min = min([r["vec_score"] for r in vec_rows] or [0.0])
-
-    def norm(x, a, b):
-        if a == b:
-            return 0.5
-        return (x - a) / (b - a)
-
-    # Fetch precomputed regulation vector distance for FTS result set
-    reg_items = []
-    reg_ids = [r["id"] for r in fts_rows] if fts_rows else []
-    reg_vec_map: dict[int, float] = {}
-    if reg_ids:
-        placeholders = ",".join(["%s"] * len(reg_ids))
-        reg_vec_rows = await execute(
-            f"SELECT id, VEC_COSINE_DISTANCE(embedding, CAST(%s AS VECTOR(384))) AS reg_vec_dist FROM reg_texts WHERE id IN ({placeholders})",
-            [qvec_str, *reg_ids],
+    return _vec_literal(embed(query))
+
+
+@lru_cache(maxsize=256)
+def _highlight_pattern(tokens: tuple[str, ...]) -> "re.Pattern[str]":
+    # Longest tokens first so a token containing another one wins at the same offset
+    return re.compile("|".join(re.escape(t) for t in sorted(tokens, key=len, reverse=True)))
+
+
+def _highlight_spans(text: str, tokens: tuple[str, ...]) -> list[dict[str, int]]:
+    """Ordered, non-overlapping match spans of ``tokens`` in ``text`` (one pass)."""
+    if not tokens:
+        return []
+    return [
+        {"start": m.start(), "end": m.end()}
+        for m in _highlight_pattern(tokens).finditer(text.lower())
+    ]
+
+
+# Candidates are the top_k FULLTEXT-matching regulations (fts_text index) and the
+# top_k nearest documents; each side is min-max normalized on its own (0.5 when
+# constant), then fused with weight 0.6 on text match and paginated server-side.
+_SQL_HYBRID = """
+    WITH fts AS (
+        SELECT id, section, text, embedding,
+               MATCH(text) AGAINST(%s IN NATURAL LANGUAGE MODE) AS fts_score
+        FROM reg_texts
+        WHERE MATCH(text) AGAINST(%s IN NATURAL LANGUAGE MODE)
+        ORDER BY fts_score DESC
+        LIMIT %s
+    ),
+    vec AS (
+        SELECT id, content,
+               VEC_COSINE_DISTANCE(embedding, CAST(%s AS VECTOR(384))) AS vec_score
+        FROM corp_docs
+        ORDER BY vec_score ASC
+        LIMIT %s
+    ),
+    scored AS (
+        SELECT 'reg' AS type, id, section, text, NULL AS content,
+               0.6 * CASE WHEN MAX(fts_score) OVER () = MIN(fts_score) OVER () THEN 0.5
+                          ELSE (fts_score - MIN(fts_score) OVER ())
+                               / (MAX(fts_score) OVER () - MIN(fts_score) OVER ()) END
+               -- prefer reg that also semantically matches query; distance in [0,2]
+               + 0.4 * (1.0 - COALESCE(VEC_COSINE_DISTANCE(embedding, CAST(%s AS VECTOR(384))), 1.0) / 2.0)
+               AS final_score
+        FROM fts
+        UNION ALL
+        SELECT 'doc', id, NULL, NULL, content,
+               0.4 * (1.0 - CASE WHEN MAX(vec_score) OVER () = MIN(vec_score) OVER () THEN 0.5
+                                 ELSE (vec_score - MIN(vec_score) OVER ())
+                                      / (MAX(vec_score) OVER () - MIN(vec_score) OVER ()) END)
+        FROM vec
+    )
+    SELECT type, id, section, text, content, final_score, COUNT(*) OVER () AS total
+    FROM scored
+    ORDER BY final_score DESC
+    LIMIT %s OFFSET %s
+"""
+
+
+@router.post("/query/hybrid", response_model=HybridResponseOut)
+async def query_hybrid(inp: HybridIn):
+    qvec_str = _query_vec_literal(inp.query)
+    rows = await execute(_SQL_HYBRID, [
+        inp.query, inp.query, inp.top_k,
+        qvec_str, inp.top_k,
+        qvec_str,
+        inp.top_k, inp.offset,
+    ])
+
+    if rows:
+        total = rows[0]["total"]
+    else:
+        # Page past the end: the window count is unavailable, so size the candidate sets directly
+        count_rows = await execute(
+            """
+            SELECT LEAST((SELECT COUNT(*) FROM reg_texts WHERE MATCH(text) AGAINST(%s IN NATURAL LANGUAGE MODE)), %s)
+                 + LEAST((SELECT COUNT(*) FROM corp_docs), %s) AS total
+            """,
+            [inp.query, inp.top_k, inp.top_k],
         )
-        reg_vec_map = {r["id"]: r["reg_vec_dist"] for r in reg_vec_rows or []}
-    for fr in fts_rows:
-        reg_vec_dist = float(reg_vec_map.get(fr["id"], 1.0))
-        reg_items.append({**fr, "reg_vec_dist": reg_vec_dist})
-
-    alpha = 0.6
-    merged = []
-    for fr in reg_items:
-        nf = norm(fr["fts_score"], f_min, f_max)
-        # prefer reg that also semantically matches query
-        rvn = 1.0 - norm(fr["reg_vec_dist"], 0.0, 2.0)  # distance in [0,2]
-        nv = rvn
-        score = alpha * nf + (1 - alpha) * nv
-        # simple highlight spans for query tokens
-        tokens = [t for t in (inp.query or "").lower().split() if len(t) >= 3]
-        reg_spans: list[dict[str, int]] = []
-        lt = fr["text"].lower()
-        for tok in tokens:
-            start = 0
-            while True:
-                idx = lt.find(tok, start)
-                if idx == -1:
-                    break
-                reg_spans.append({"start": idx, "end": idx + len(tok)})
-                start = idx + len(tok)
-        merged.append({
-            "type": "reg",
-            "id": fr["id"],
-            "section": fr["section"],
-            "text": fr["text"],
-            "fts_score": fr["fts_score"],
-            "vec_score": fr["reg_vec_dist"],
-            "final_score": score,
-            "highlights": reg_spans
-        })
-    for vr in vec_rows:
-        nf = 0.0
-        nv = 1.0 - norm(vr["vec_score"], v_min, v_max)
-        score = alpha * nf + (1 - alpha) * nv
-        # highlights for docs
-        tokens = [t for t in (inp.query or "").lower().split() if len(t) >= 3]
-        doc_spans: list[dict[str, int]] = []
-        lc = vr["content"].lower()
-        for tok in tokens:
-            start = 0
-            while True:
-                idx = lc.find(tok, start)
-                if idx == -1:
-                    break
-                doc_spans.append({"start": idx, "end": idx + len(tok)})
-                start = idx + len(tok)
-        merged.append({
-            "type": "doc",
-            "id": vr["id"],
-            "content": vr["content"],
-            "vec_score": vr["vec_score"],
-            "final_score": score,
-            "highlights": doc_spans
-        })
-    merged.sort(key=lambda x: x["final_score"], reverse=True)
-    
-    # Apply pagination
-    total = len(merged)
-    start_idx = inp.offset
-    end_idx = start_idx + inp.top_k
-    paginated_results = merged[start_idx:end_idx]
-    
+        total = count_rows[0]["total"] if count_rows else 0
+
+    # simple highlight spans for query tokens, only for the page being returned
+    tokens = tuple(sorted({t for t in (inp.query or "").lower().split() if len(t) >= 3}))
+    results = []
+    for r in rows:
+        if r["type"] == "reg":
+            results.append({
+                "type": "reg",
+                "id": r["id"],
+                "section": r["section"],
+                "text": r["text"],
+                "final_score": float(r["final_score"]),
+                "highlights": _highlight_spans(r["text"], tokens)
+            })
+        else:
+            results.append({
+                "type": "doc",
+                "id": r["id"],
+                "content": r["content"],
+                "final_score": float(r["final_score"]),
+                "highlights": _highlight_spans(r["content"], tokens)
+            })
+
     pagination = PaginationOut(
         total=total,
         limit=inp.top_k,
         offset=inp.offset,
-        has_more=end_idx < total
+        has_more=inp.offset + inp.top_k < total
     )
     
-    return {"results": paginated_results, "pagination": pagination}
+    return {"results": results, "pagination": pagination}
 
-@app.post("/action/task", response_model=OkOut)
+@router.post("/action/task", response_model=OkOut)
 async def action_task(inp: TaskIn):
     insert_sql = """
     INSERT INTO tasks(finding_id, system, external_id, status, assignee, due_date)
@@ -1200,40 +1534,55 @@ async def action_task(inp: TaskIn):
 
 
 # Documents management endpoints
-@app.get("/documents", response_model=DocumentsOut)
+@router.get("/documents", response_model=DocumentsOut)
 async def list_documents(limit: int = Query(default=50, ge=1, le=500), offset: int = Query(default=0, ge=0)):
-    # Get total count first
+    # Chunk statistics are kept on documents_meta by the ingest paths via
+    # _record_doc_chunks; rows without chunks are metadata-only (e.g. reg:<id>)
+    # and not listed as docs. corp_docs rows written outside this API (e.g.
+    # simplified_main.py or manual SQL) are not counted until migration 020's
+    # backfill is re-run, so treat these counts as approximate in that case.
     count_sql = """
     SELECT 
-        (SELECT COUNT(DISTINCT path) FROM corp_docs) + 
+        (SELECT COUNT(*) FROM documents_meta WHERE chunks > 0) + 
         (SELECT COUNT(*) FROM reg_texts) as total
     """
-    count_result = await execute(count_sql, [])
-    total = count_result[0]["total"] if count_result else 0
     
     # Get documents with pagination
     docs_sql = """
-    SELECT c.path,
-           MIN(c.created_at) AS first_seen,
-           MAX(c.created_at) AS last_seen,
-           COUNT(*) AS chunks,
-           m.display_name,
-           m.description,
-           COALESCE(m.resolved, FALSE) AS resolved
-    FROM corp_docs c
-    LEFT JOIN documents_meta m ON m.path = c.path
-    GROUP BY c.path, m.display_name, m.description, m.resolved
+    SELECT path, first_seen, last_seen, chunks,
+           display_name, description,
+           COALESCE(resolved, FALSE) AS resolved
+    FROM documents_meta
+    WHERE chunks > 0
     ORDER BY last_seen DESC
     LIMIT %s OFFSET %s
     """
-    doc_rows = await execute(docs_sql, [limit, offset])
+    
+    # Regulations fill the page after the docs. Their offset depends on how many
+    # docs come back, which lies in [0, limit], so fetch the window covering every
+    # possible offset and slice it once the doc count is known.
+    regs_sql = """
+    SELECT id, title, created_at
+    FROM reg_texts
+    ORDER BY created_at DESC
+    LIMIT %s OFFSET %s
+    """
+    regs_lo = max(0, offset - limit)
+    
+    count_result, doc_rows, reg_window = await asyncio.gather(
+        execute(count_sql, []),
+        execute(docs_sql, [limit, offset]),
+        execute(regs_sql, [limit + offset - regs_lo, regs_lo]),
+    )
+    total = count_result[0]["total"] if count_result else 0
+    
     docs = [{
         "path": r["path"],
         "display_name": r.get("display_name") or r["path"],
         "description": r.get("description"),
         "resolved": bool(r.get("resolved")),
-        "first_seen": r["first_seen"].isoformat() if r["first_seen"] else None,
-        "last_seen": r["last_seen"].isoformat() if r["last_seen"] else None,
+        "first_seen": r["first_seen"],
+        "last_seen": r["last_seen"],
         "chunks": r["chunks"],
         "type": "doc",
     } for r in doc_rows or []]
@@ -1243,36 +1592,33 @@ async def list_documents(limit: int = Query(default=50, ge=1, le=500), offset: i
     remaining_offset = max(0, offset - len(docs))
     
     if remaining_limit > 0:
-        regs_sql = """
-        SELECT id, title, created_at
-        FROM reg_texts
-        ORDER BY created_at DESC
-        LIMIT %s OFFSET %s
-        """
-        regs = await execute(regs_sql, [remaining_limit, remaining_offset])
-        for r in regs or []:
+        start = remaining_offset - regs_lo
+        regs = (reg_window or [])[start:start + remaining_limit]
+        for r in regs:
             docs.append({
                 "path": f"reg:{r['id']}",
                 "display_name": r.get("title") or f"Reg {r['id']}",
                 "description": None,
                 "resolved": False,
-                "first_seen": r["created_at"].isoformat() if r.get("created_at") else None,
-                "last_seen": r["created_at"].isoformat() if r.get("created_at") else None,
+                "first_seen": r.get("created_at"),
+                "last_seen": r.get("created_at"),
                 "chunks": 1,
                 "type": "reg",
             })
     
-    pagination = PaginationOut(
-        total=total,
-        limit=limit,
-        offset=offset,
-        has_more=(offset + len(docs)) < total
-    )
-
-    return {"documents": docs, "pagination": pagination}
+    # datetimes go straight to orjson instead of per-row isoformat()
+    return AppORJSONResponse(content={
+        "documents": docs,
+        "pagination": {
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "has_more": (offset + len(docs)) < total
+        }
+    })
 
 
-@app.get("/documents/{path:path}", response_model=DocumentReadOut)
+@router.get("/documents/{path:path}", response_model=DocumentReadOut)
 async def read_document(path: str):
     # Allow special reg:<id> paths to fetch regulation text
     if path.startswith("reg:"):
@@ -1283,19 +1629,18 @@ async def read_document(path: str):
         rows = await execute("SELECT text FROM reg_texts WHERE id=%s", [reg_id])
         content = rows[0]["text"] if rows else ""
         return {"path": path, "content": content}
-    # Return concatenated content for regular documents
+    # Return concatenated content for regular documents, joined server-side
     sql = """
-    SELECT content
+    SELECT GROUP_CONCAT(content ORDER BY chunk_idx ASC SEPARATOR '') AS content
     FROM corp_docs
     WHERE path=%s
-    ORDER BY chunk_idx ASC
     """
     rows = await execute(sql, [path])
-    content = "".join([r["content"] for r in rows or []])
+    content = (rows[0]["content"] if rows else None) or ""
     return {"path": path, "content": content}
 
 
-@app.patch("/documents/{path:path}", response_model=OkOut)
+@router.patch("/documents/{path:path}", response_model=OkOut)
 async def update_document_meta(path: str, body: DocMetaIn | DocMarkIn, current_user: User = Depends(require_role(["analyst", "admin"]))): 
     # Upsert into documents_meta
     if isinstance(body, DocMarkIn):
@@ -1316,7 +1661,7 @@ async def update_document_meta(path: str, body: DocMetaIn | DocMarkIn, current_u
         return {"ok": True}
 
 
-@app.delete("/documents/{path:path}", response_model=OkOut)
+@router.delete("/documents/{path:path}", response_model=OkOut)
 async def delete_document(path: str, current_user: User = Depends(require_role(["analyst", "admin"]))): 
     # Delete regulation or document
     if path.startswith("reg:"):
@@ -1333,13 +1678,13 @@ async def delete_document(path: str, current_user: User = Depends(require_role([
     return {"ok": True}
 
 
-@app.post("/mappings", response_model=OkOut)
+@router.post("/mappings", response_model=OkOut)
 async def create_mapping(inp: MapIn, current_user: User = Depends(require_role(["analyst", "admin"]))): 
     sql = "INSERT INTO mappings(reg_id, doc_id, confidence) VALUES(%s,%s,%s)"
     await execute(sql, [inp.reg_id, inp.doc_id, inp.confidence])
     return {"ok": True}
 
-@app.get("/coverage", response_model=CoverageOut)
+@router.get("/coverage", response_model=CoverageOut)
 async def coverage():
     sql = """
     SELECT r.id as reg_id, r.section, COUNT(m.id) as evidence_count
@@ -1352,7 +1697,7 @@ async def coverage():
     return {"items": rows}
 
 
-@app.get("/coverage/{reg_id}", response_model=CoverageDetailOut)
+@router.get("/coverage/{reg_id}", response_model=CoverageDetailOut)
 async def coverage_detail(reg_id: int):
     header = await execute("SELECT id, section, text FROM reg_texts WHERE id=%s", [reg_id])
     items_sql = """
@@ -1367,23 +1712,49 @@ async def coverage_detail(reg_id: int):
     return {"reg": header[0] if header else None, "items": items}
 
 
+@lru_cache(maxsize=1)
 def _ollama_url() -> str:
-    return os.getenv("OLLAMA_URL", "http://127.0.0.1:11434")
+    # .env is loaded at import, before any request reads this
+    return os.getenv("OLLAMA_URL", "http://127.0.0.1:11434").rstrip("/")
+
+_OLLAMA_TAGS_TTL = 30.0
+_ollama_tags_cache: tuple[float, list[str]] | None = None
+
+
+async def _list_ollama_models() -> list[str]:
+    """Installed Ollama model names, cached briefly so repeated 404s don't refetch /api/tags."""
+    global _ollama_tags_cache
+    now = time.monotonic()
+    if _ollama_tags_cache is not None and now - _ollama_tags_cache[0] < _OLLAMA_TAGS_TTL:
+        return _ollama_tags_cache[1]
+    try:
+        tags = await app.state.http.get(_ollama_url() + "/api/tags", timeout=10)
+        if tags.status_code != 200:
+            return []
+        tag_json = tags.json()
+        available = [m.get("name") for m in (tag_json.get("models") or []) if m.get("name")]
+    except Exception:
+        return []
+    _ollama_tags_cache = (now, available)
+    return available
+
+_JSON_DECODER = json.JSONDecoder()
+
 
 def _extract_json(text: str) -> dict | None:
     try:
-        return json.loads(text)
+        return orjson.loads(text)
     except Exception:
         pass
-    # try to extract fenced code block
+    # try to extract fenced code block: decode the object starting at the first
+    # brace and stop where it ends, rather than scanning back for the last brace
+    start = text.find("{")
+    if start == -1:
+        return None
     try:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            return json.loads(text[start:end+1])
+        return _JSON_DECODER.raw_decode(text, start)[0]
     except Exception:
         return None
-    return None
 
 # Global error handlers (consistent API errors)
 app.add_exception_handler(APIError, cast(ExceptionHandler, api_error_handler))
@@ -1391,23 +1762,39 @@ app.add_exception_handler(HTTPException, cast(ExceptionHandler, http_error_handl
 app.add_exception_handler(RequestValidationError, cast(ExceptionHandler, validation_error_handler))
 app.add_exception_handler(Exception, unhandled_error_handler)
 
-@app.post("/ai/explain", response_model=ExplainOut)
+# Prompt templates are assembled once; each request fills them with a single format call
+_EXPLAIN_PROMPT = (
+    "You are a compliance analyst. Given the regulation excerpt and company document excerpt, "
+    "explain the relationship, identify any potential compliance risks, and summarize in 5 bullets.\n\n"
+    "Regulation:\n{regulation}\n\n"
+    "Document:\n{document}\n\n"
+    "{query}"
+    "Return STRICT JSON with fields: summary (string), risks (array of strings). No extra commentary."
+).format
+
+_FIX_IT_PROMPT = (
+    "You are a compliance officer. Draft a practical remediation plan to address gaps between the regulation and the document. "
+    "Provide prioritized actions, owners, and timelines in bullet points.\n\n"
+    "Regulation:\n{regulation}\n\n"
+    "Document:\n{document}\n\n"
+    "{context}"
+    "Return STRICT JSON with fields: actions (array of {{title, owner, timeline}}), notes (string)."
+).format
+
+
+@router.post("/ai/explain", response_model=ExplainOut)
 async def ai_explain(inp: ExplainIn):
-    prompt = (
-        "You are a compliance analyst. Given the regulation excerpt and company document excerpt, "
-        "explain the relationship, identify any potential compliance risks, and summarize in 5 bullets.\n\n"
-        f"Regulation:\n{inp.regulation_text}\n\n"
-        f"Document:\n{inp.document_text}\n\n"
-        + (f"Query: {inp.query}\n\n" if inp.query else "")
-        + "Return STRICT JSON with fields: summary (string), risks (array of strings). No extra commentary."
+    prompt = _EXPLAIN_PROMPT(
+        regulation=inp.regulation_text,
+        document=inp.document_text,
+        query=f"Query: {inp.query}\n\n" if inp.query else "",
     )
     model = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
     payload = {"model": model, "prompt": prompt, "stream": False}
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(_ollama_url() + "/api/generate", json=payload)
-            r.raise_for_status()
-            data = r.json()
+        r = await _post_json(_ollama_url() + "/api/generate", payload, 60)
+        r.raise_for_status()
+        data = r.json()
         raw = data.get("response", "")
         parsed = _extract_json(raw)
         if parsed and isinstance(parsed, dict):
@@ -1418,15 +1805,7 @@ async def ai_explain(inp: ExplainIn):
     except httpx.HTTPStatusError as http_exc:
         # Common case: model not found returns 404 from Ollama
         if http_exc.response is not None and http_exc.response.status_code == 404:
-            available = []
-            try:
-                async with httpx.AsyncClient(timeout=10) as client:
-                    tags = await client.get(_ollama_url() + "/api/tags")
-                    if tags.status_code == 200:
-                        tag_json = tags.json()
-                        available = [m.get("name") for m in (tag_json.get("models") or []) if m.get("name")]
-            except Exception:
-                pass
+            available = await _list_ollama_models()
             detail = {
                 "error": "model_not_found",
                 "message": f"Model '{model}' not found in Ollama. Install it or pick an installed one.",
@@ -1441,23 +1820,19 @@ async def ai_explain(inp: ExplainIn):
         raise HTTPException(status_code=503, detail=f"LLM backend unavailable: {exc}")
 
 
-@app.post("/ai/fix-it", response_model=FixItOut)
+@router.post("/ai/fix-it", response_model=FixItOut)
 async def ai_fix_it(inp: FixItIn):
-    prompt = (
-        "You are a compliance officer. Draft a practical remediation plan to address gaps between the regulation and the document. "
-        "Provide prioritized actions, owners, and timelines in bullet points.\n\n"
-        f"Regulation:\n{inp.regulation_text}\n\n"
-        f"Document:\n{inp.document_text}\n\n"
-        + (f"Context: {inp.context}\n\n" if inp.context else "")
-        + "Return STRICT JSON with fields: actions (array of {title, owner, timeline}), notes (string)."
+    prompt = _FIX_IT_PROMPT(
+        regulation=inp.regulation_text,
+        document=inp.document_text,
+        context=f"Context: {inp.context}\n\n" if inp.context else "",
     )
     model = os.getenv("OLLAMA_MODEL", "llama3.1:8b")
     payload = {"model": model, "prompt": prompt, "stream": False}
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(_ollama_url() + "/api/generate", json=payload)
-            r.raise_for_status()
-            data = r.json()
+        r = await _post_json(_ollama_url() + "/api/generate", payload, 60)
+        r.raise_for_status()
+        data = r.json()
         raw = data.get("response", "")
         parsed = _extract_json(raw)
         if parsed and isinstance(parsed, dict):
@@ -1476,15 +1851,7 @@ async def ai_fix_it(inp: FixItIn):
         return {"result": {"actions": [{"title": str(raw), "owner": None, "timeline": None}], "notes": ""}}
     except httpx.HTTPStatusError as http_exc:
         if http_exc.response is not None and http_exc.response.status_code == 404:
-            available = []
-            try:
-                async with httpx.AsyncClient(timeout=10) as client:
-                    tags = await client.get(_ollama_url() + "/api/tags")
-                    if tags.status_code == 200:
-                        tag_json = tags.json()
-                        available = [m.get("name") for m in (tag_json.get("models") or []) if m.get("name")]
-            except Exception:
-                pass
+            available = await _list_ollama_models()
             detail = {
                 "error": "model_not_found",
                 "message": f"Model '{model}' not found in Ollama. Install it or pick an installed one.",
@@ -1499,7 +1866,7 @@ async def ai_fix_it(inp: FixItIn):
         raise HTTPException(status_code=503, detail=f"LLM backend unavailable: {exc}")
 
 
-@app.get("/recent-documents", response_model=RecentDocumentsOut)
+@router.get("/recent-documents", response_model=RecentDocumentsOut)
 async def get_recent_documents():
     # Get recent regulations
     reg_sql = """
@@ -1528,7 +1895,7 @@ async def get_recent_documents():
             "id": reg["id"],
             "name": reg["title"],
             "type": "reg",
-            "uploadedAt": reg["created_at"].isoformat() if reg["created_at"] else None,
+            "uploadedAt": reg["created_at"],
             "source": reg["source"]
         })
     
@@ -1537,19 +1904,19 @@ async def get_recent_documents():
             "id": doc["path"].replace("/", "_").replace(".", "_"),  # Generate a pseudo ID
             "name": doc["path"],
             "type": "doc",
-            "uploadedAt": doc["created_at"].isoformat() if doc["created_at"] else None,
+            "uploadedAt": doc["created_at"],
             "path": doc["path"]
         })
     
     # Sort by upload time (most recent first)
-    documents.sort(key=lambda x: x["uploadedAt"] or "", reverse=True)
+    documents.sort(key=lambda x: x["uploadedAt"] or datetime.min, reverse=True)
     
-    # Return top 10 most recent
-    return {"documents": documents[:10]}
+    # Return top 10 most recent; orjson serializes the datetimes
+    return AppORJSONResponse(content={"documents": documents[:10]})
 
 
 # Chat endpoints
-@app.post("/chat", response_model=ChatResponseOut)
+@router.post("/chat", response_model=ChatResponseOut)
 async def send_chat_message(message: ChatMessageIn, current_user: User = Depends(get_current_active_user)):
     """Send a message in a conversation and get AI response based on uploaded documents"""
     try:
@@ -1644,11 +2011,10 @@ Context:
             "stream": False
         }
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            
-            ai_response = response.json().get("message", {}).get("content", "I apologize, but I couldn't generate a response.")
+        response = await _post_json(url, payload, 30)
+        response.raise_for_status()
+        
+        ai_response = response.json().get("message", {}).get("content", "I apologize, but I couldn't generate a response.")
         
         # Store AI response
         ai_metadata = {"sources": search_results[:3]} if search_results else None
@@ -1701,7 +2067,7 @@ Context:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
-@app.get("/chat/conversations", response_model=list[ConversationOut])
+@router.get("/chat/conversations", response_model=list[ConversationOut])
 async def get_conversations(current_user: User = Depends(get_current_active_user)):
     """Get user's conversation list"""
     sql = """
@@ -1726,7 +2092,7 @@ async def get_conversations(current_user: User = Depends(get_current_active_user
     } for row in rows or []]
 
 
-@app.get("/chat/conversations/{conversation_id}/messages", response_model=list[ChatMessageOut])
+@router.get("/chat/conversations/{conversation_id}/messages", response_model=list[ChatMessageOut])
 async def get_conversation_messages(conversation_id: int, current_user: User = Depends(get_current_active_user)):
     """Get messages for a conversation"""
     # Verify user owns this conversation
@@ -1754,7 +2120,7 @@ async def get_conversation_messages(conversation_id: int, current_user: User = D
     } for row in rows or []]
 
 
-@app.delete("/chat/conversations/{conversation_id}")
+@router.delete("/chat/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: int, current_user: User = Depends(get_current_active_user)):
     """Delete a conversation and all its messages"""
     # Verify user owns this conversation
@@ -1771,7 +2137,7 @@ async def delete_conversation(conversation_id: int, current_user: User = Depends
 
 
 # Compliance Analysis Endpoints
-@app.post("/compliance/analyze", response_model=ComplianceAnalysisOut)
+@router.post("/compliance/analyze", response_model=ComplianceAnalysisOut)
 async def analyze_document_compliance(doc_id: int, current_user: User = Depends(require_role(["analyst", "admin"]))):
     """Analyze a document for compliance issues and generate score"""
     try:
@@ -1812,7 +2178,7 @@ async def analyze_document_compliance(doc_id: int, current_user: User = Depends(
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
-@app.get("/compliance/status/{doc_id}", response_model=ComplianceStatusOut)
+@router.get("/compliance/status/{doc_id}", response_model=ComplianceStatusOut)
 async def get_document_compliance_status(doc_id: int, current_user: User = Depends(get_current_active_user)):
     """Get compliance status for a specific document"""
     sql = """
@@ -1854,7 +2220,7 @@ async def get_document_compliance_status(doc_id: int, current_user: User = Depen
     }
 
 
-@app.get("/compliance/dashboard", include_in_schema=False)
+@router.get("/compliance/dashboard", include_in_schema=False)
 async def get_compliance_dashboard(current_user: User = Depends(get_current_active_user)):
     """Deprecated: use /api/v1/compliance/dashboard"""
     return await get_compliance_dashboard_v1(current_user)
@@ -1967,7 +2333,7 @@ async def get_compliance_dashboard(current_user: User = Depends(get_current_acti
     }
 
 
-@app.get("/compliance/frameworks")
+@router.get("/compliance/frameworks")
 async def get_compliance_frameworks(current_user: User = Depends(get_current_active_user)):
     """Get available compliance frameworks"""
     sql = "SELECT * FROM compliance_frameworks WHERE is_active = TRUE ORDER BY name"
@@ -2029,7 +2395,7 @@ class WorkflowStatusOut(BaseModel):
     progress: dict
 
 
-@app.get("/workflow/templates", response_model=dict)
+@app.get("/workflow/templates")
 async def get_workflow_templates(current_user: User = Depends(get_current_active_user)):
     """Get available workflow templates"""
     sql = """
@@ -2046,24 +2412,18 @@ async def get_workflow_templates(current_user: User = Depends(get_current_active
         template = dict(row)
         # Parse JSON fields
         try:
-            template["trigger_config"] = json.loads(template["trigger_config"]) if template["trigger_config"] else {}
-            template["steps"] = json.loads(template["steps"]) if template["steps"] else []
-        except:
+            template["trigger_config"] = _loads(template["trigger_config"])
+            template["steps"] = _loads(template["steps"], [])
+        except orjson.JSONDecodeError:
             template["trigger_config"] = {}
             template["steps"] = []
         
-        # Convert datetime to string
-        if template["created_at"]:
-            template["created_at"] = template["created_at"].isoformat()
-        if template["updated_at"]:
-            template["updated_at"] = template["updated_at"].isoformat()
-            
         templates.append(template)
     
-    return {"templates": templates}
+    return AppORJSONResponse(content={"templates": templates})
 
 
-@app.get("/workflow/instances", response_model=dict)
+@app.get("/workflow/instances")
 async def get_workflow_instances(
     status: str = Query(None, description="Filter by status"),
     limit: int = Query(50, ge=1, le=100),
@@ -2082,16 +2442,8 @@ async def get_workflow_instances(
     
     where_clause = " AND ".join(where_conditions)
     
-    # Get total count
-    count_sql = f"""
-    SELECT COUNT(*) as total
-    FROM workflow_instances wi
-    WHERE {where_clause}
-    """
-    count_result = await execute(count_sql, params)
-    total = count_result[0]["total"] if count_result else 0
-    
-    # Get instances with pagination
+    # Get instances with pagination; one extra row tells us whether there is
+    # a next page without a separate COUNT(*) query
     sql = f"""
     SELECT wi.*, wt.name as template_name
     FROM workflow_instances wi
@@ -2100,36 +2452,31 @@ async def get_workflow_instances(
     ORDER BY wi.created_at DESC
     LIMIT %s OFFSET %s
     """
-    params.extend([limit, offset])
-    rows = await execute(sql, params)
+    params.extend([limit + 1, offset])
+    rows = await execute(sql, params) or []
+    has_more = len(rows) > limit
     
     instances = []
-    for row in rows or []:
+    for row in rows[:limit]:
         instance = dict(row)
         # Parse JSON fields
         try:
-            instance["trigger_data"] = json.loads(instance["trigger_data"]) if instance["trigger_data"] else {}
-            instance["context_data"] = json.loads(instance["context_data"]) if instance["context_data"] else {}
-        except:
+            instance["trigger_data"] = _loads(instance["trigger_data"])
+            instance["context_data"] = _loads(instance["context_data"])
+        except orjson.JSONDecodeError:
             instance["trigger_data"] = {}
             instance["context_data"] = {}
         
-        # Convert datetime to string
-        for field in ["started_at", "completed_at", "created_at", "updated_at"]:
-            if instance[field]:
-                instance[field] = instance[field].isoformat()
-        
         instances.append(instance)
     
-    return {
+    return AppORJSONResponse(content={
         "instances": instances,
         "pagination": {
-            "total": total,
             "limit": limit,
             "offset": offset,
-            "has_more": offset + limit < total
+            "has_more": has_more
         }
-    }
+    })
 
 
 @app.post("/workflow/instances", response_model=dict)
@@ -2171,39 +2518,23 @@ async def get_workflow_status(
     try:
         status = await workflow_engine.get_workflow_status(instance_id)
         
-        # Convert datetime fields to strings
-        if status["instance"]["created_at"]:
-            status["instance"]["created_at"] = status["instance"]["created_at"].isoformat()
-        if status["instance"]["updated_at"]:
-            status["instance"]["updated_at"] = status["instance"]["updated_at"].isoformat()
-        if status["instance"]["started_at"]:
-            status["instance"]["started_at"] = status["instance"]["started_at"].isoformat()
-        if status["instance"]["completed_at"]:
-            status["instance"]["completed_at"] = status["instance"]["completed_at"].isoformat()
-        
         # Parse JSON fields
         try:
-            status["instance"]["trigger_data"] = json.loads(status["instance"]["trigger_data"]) if status["instance"]["trigger_data"] else {}
-            status["instance"]["context_data"] = json.loads(status["instance"]["context_data"]) if status["instance"]["context_data"] else {}
-        except:
+            status["instance"]["trigger_data"] = _loads(status["instance"]["trigger_data"])
+            status["instance"]["context_data"] = _loads(status["instance"]["context_data"])
+        except orjson.JSONDecodeError:
             status["instance"]["trigger_data"] = {}
             status["instance"]["context_data"] = {}
         
-        # Convert step datetime fields
         for step in status["steps"]:
-            for field in ["started_at", "completed_at", "created_at", "updated_at"]:
-                if step[field]:
-                    step[field] = step[field].isoformat()
-            
-            # Parse JSON fields
             try:
-                step["input_data"] = json.loads(step["input_data"]) if step["input_data"] else {}
-                step["output_data"] = json.loads(step["output_data"]) if step["output_data"] else {}
-            except:
+                step["input_data"] = _loads(step["input_data"])
+                step["output_data"] = _loads(step["output_data"])
+            except orjson.JSONDecodeError:
                 step["input_data"] = {}
                 step["output_data"] = {}
         
-        return status
+        return AppORJSONResponse(content=status)
         
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -2249,6 +2580,21 @@ async def cancel_workflow(
         raise HTTPException(status_code=500, detail=f"Failed to cancel workflow: {str(e)}")
 
 
+# Path keywords per document type, checked in priority order
+_DOCUMENT_TYPE_KEYWORDS = (
+    ("policy", ("policy", "procedure")),
+    ("contract", ("contract",)),
+)
+
+
+def _detect_document_type(document_path: str) -> str:
+    path_lower = document_path.lower()
+    for document_type, keywords in _DOCUMENT_TYPE_KEYWORDS:
+        if any(keyword in path_lower for keyword in keywords):
+            return document_type
+    return "document"
+
+
 @app.post("/workflow/trigger/document-upload", response_model=dict)
 async def trigger_document_upload_workflows(
     document_id: int,
@@ -2264,74 +2610,75 @@ async def trigger_document_upload_workflows(
         FROM workflow_templates 
         WHERE trigger_type = 'document_upload' AND is_active = TRUE
         """
-        templates = await execute(templates_sql)
+        templates = await execute(templates_sql) or []
         
-        triggered_workflows = []
+        # Simple document type detection based on path (same for every template)
+        detected_type = _detect_document_type(document_path)
         
-        for template in templates or []:
+        # Decode all trigger configs in one pass up front
+        configured = []
+        for template in templates:
             try:
-                trigger_config = json.loads(template["trigger_config"]) if template["trigger_config"] else {}
-                
-                # Check if this document type should trigger the workflow
-                document_types = trigger_config.get("document_types", [])
-                auto_start = trigger_config.get("auto_start", False)
-                
-                # Simple document type detection based on path
-                detected_type = "document"
-                if any(keyword in document_path.lower() for keyword in ["policy", "procedure"]):
-                    detected_type = "policy"
-                elif "contract" in document_path.lower():
-                    detected_type = "contract"
-                
-                # Check if workflow should be triggered
-                should_trigger = (
-                    not document_types or  # No filter means trigger for all
-                    detected_type in document_types or
-                    "all" in document_types
-                )
-                
-                if should_trigger:
-                    # Create workflow instance
-                    instance_id = await workflow_engine.create_workflow_instance(
-                        template_id=template["id"],
-                        trigger_data={
-                            "event": "document_upload",
-                            "document_id": document_id,
-                            "document_path": document_path,
-                            "document_type": detected_type,
-                            "triggered_by": current_user.username
-                        },
-                        context_data={
-                            "document_id": document_id,
-                            "document_path": document_path,
-                            "instance_id": None  # Will be set after creation
-                        },
-                        assigned_to=current_user.username
-                    )
-                    
-                    # Update context with instance ID
-                    await execute(
-                        "UPDATE workflow_instances SET context_data = JSON_SET(context_data, '$.instance_id', %s) WHERE id = %s",
-                        (instance_id, instance_id)
-                    )
-                    
-                    # Start workflow if auto_start is enabled
-                    if auto_start:
-                        await workflow_engine.start_workflow(instance_id)
-                        status = "started"
-                    else:
-                        status = "created"
-                    
-                    triggered_workflows.append({
-                        "template_id": template["id"],
-                        "template_name": template["name"],
-                        "instance_id": instance_id,
-                        "status": status
-                    })
-                    
-            except Exception as e:
-                import logging
-                logging.getLogger(__name__).error(f"Failed to trigger workflow template {template['id']}: {str(e)}")
+                configured.append((template, _loads(template["trigger_config"])))
+            except orjson.JSONDecodeError as e:
+                logger.error(f"Failed to trigger workflow template {template['id']}: {str(e)}")
+        
+        # Check which workflows should be triggered for this document type
+        matching = []
+        for template, trigger_config in configured:
+            document_types = trigger_config.get("document_types", [])
+            if (
+                not document_types or  # No filter means trigger for all
+                detected_type in document_types or
+                "all" in document_types
+            ):
+                matching.append((template, trigger_config.get("auto_start", False)))
+        
+        async def _trigger_one(template, auto_start: bool) -> dict:
+            # Create workflow instance
+            instance_id = await workflow_engine.create_workflow_instance(
+                template_id=template["id"],
+                trigger_data={
+                    "event": "document_upload",
+                    "document_id": document_id,
+                    "document_path": document_path,
+                    "document_type": detected_type,
+                    "triggered_by": current_user.username
+                },
+                context_data={
+                    "document_id": document_id,
+                    "document_path": document_path,
+                    "instance_id": None  # Filled in by the engine on creation
+                },
+                assigned_to=current_user.username
+            )
+            
+            # Start workflow if auto_start is enabled
+            if auto_start:
+                await workflow_engine.start_workflow(instance_id)
+                status = "started"
+            else:
+                status = "created"
+            
+            return {
+                "template_id": template["id"],
+                "template_name": template["name"],
+                "instance_id": instance_id,
+                "status": status
+            }
+        
+        # Overlap the per-template round trips instead of awaiting them one by one
+        results = await asyncio.gather(
+            *(_trigger_one(template, auto_start) for template, auto_start in matching),
+            return_exceptions=True
+        )
+        
+        triggered_workflows = []
+        for (template, _), result in zip(matching, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to trigger workflow template {template['id']}: {str(result)}")
+            else:
+                triggered_workflows.append(result)
         
         return {
             "triggered_workflows": triggered_workflows,
@@ -2385,7 +2732,7 @@ class VersionTagIn(BaseModel):
     tag_type: str = "custom"
 
 
-@app.get("/documents/{document_id}/versions", response_model=dict)
+@app.get("/documents/{document_id}/versions")
 async def get_document_versions(
     document_id: int,
     limit: int = Query(50, ge=1, le=100),
@@ -2396,11 +2743,11 @@ async def get_document_versions(
     try:
         versions = await version_manager.get_document_versions(document_id, limit)
         
-        return {
+        return AppORJSONResponse(content={
             "document_id": document_id,
             "versions": versions,
             "total": len(versions)
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get document versions: {str(e)}")
@@ -2569,16 +2916,17 @@ async def get_version_changes(
     
     try:
         if compare_to is None:
-            # Find previous version
+            # Find previous version (single seek on idx_document_version)
             prev_version_query = """
-            SELECT id FROM document_versions 
-            WHERE document_id = %s AND version_number < (
+            WITH ref AS (
                 SELECT version_number FROM document_versions WHERE id = %s
             )
-            ORDER BY version_number DESC
+            SELECT dv.id FROM document_versions dv, ref
+            WHERE dv.document_id = %s AND dv.version_number < ref.version_number
+            ORDER BY dv.version_number DESC
             LIMIT 1
             """
-            prev_result = await execute(prev_version_query, [document_id, version_id])
+            prev_result = await execute(prev_version_query, [version_id, document_id])
             
             if not prev_result:
                 return {"changes": [], "message": "No previous version to compare to"}
@@ -2641,7 +2989,13 @@ class GenerateReportIn(BaseModel):
     generated_for: str = "all"
 
 
-@app.get("/audit/events", response_model=dict)
+_AUDIT_ENUM_MEMBERS = {
+    enum_cls: {member.value: member for member in enum_cls}
+    for enum_cls in (EventType, Action, ResourceType, RiskLevel)
+}
+
+
+@app.get("/audit/events")
 async def get_audit_events(
     event_types: str = Query(None, description="Comma-separated event types"),
     actions: str = Query(None, description="Comma-separated actions"),
@@ -2657,19 +3011,12 @@ async def get_audit_events(
     """Get filtered audit trail events"""
     
     try:
-        # Parse and convert query parameters to enums
+        # Parse and convert query parameters to enums; unknown tokens are dropped
         def _parse_enum_list(value: str | None, enum_cls):
             if not value:
                 return None
-            items: list = []
-            for raw in value.split(','):
-                token = raw.strip()
-                if not token:
-                    continue
-                try:
-                    items.append(enum_cls(token))
-                except Exception:
-                    pass
+            members = _AUDIT_ENUM_MEMBERS[enum_cls]
+            items = [members[token] for raw in value.split(',') if (token := raw.strip()) in members]
             return items or None
 
         event_type_list = _parse_enum_list(event_types, EventType)
@@ -2677,40 +3024,50 @@ async def get_audit_events(
         resource_type_list = _parse_enum_list(resource_types, ResourceType)
         risk_level_list = _parse_enum_list(risk_levels, RiskLevel)
 
-        start_datetime = datetime.fromisoformat(start_date) if start_date else None
-        end_datetime = datetime.fromisoformat(end_date) if end_date else None
+        start_datetime = _parse_iso(start_date) if start_date else None
+        end_datetime = _parse_iso(end_date) if end_date else None
 
         # Build kwargs only with provided filters to satisfy type checker
-        kwargs: dict = {"limit": limit, "offset": offset}
-        if event_type_list is not None:
-            kwargs["event_types"] = event_type_list
-        if action_list is not None:
-            kwargs["actions"] = action_list
-        if resource_type_list is not None:
-            kwargs["resource_types"] = resource_type_list
-        if user_id is not None:
-            kwargs["user_id"] = user_id
-        if start_datetime is not None:
-            kwargs["start_date"] = start_datetime
-        if end_datetime is not None:
-            kwargs["end_date"] = end_datetime
-        if risk_level_list is not None:
-            kwargs["risk_levels"] = risk_level_list
-
-        events = await audit_logger.get_audit_trail(**kwargs)
-        
-        return {
-            "events": events,
-            "total": len(events),
-            "limit": limit,
-            "offset": offset
-        }
+        filters = (
+            ("event_types", event_type_list),
+            ("actions", action_list),
+            ("resource_types", resource_type_list),
+            ("user_id", user_id),
+            ("start_date", start_datetime),
+            ("end_date", end_datetime),
+            ("risk_levels", risk_level_list),
+        )
+        kwargs: dict = {"limit": limit, "offset": offset, **{k: v for k, v in filters if v is not None}}
+
+        # Stream rows straight from a server-side cursor so large exports stay
+        # O(1) in memory. The query runs and its first batch is fetched here, so
+        # database errors still map to a 500 before any bytes are sent.
+        events = await audit_logger.iter_audit_trail(**kwargs)
+
+        async def _stream_events():
+            total = 0
+            try:
+                yield b'{"events":['
+                async for event in events:
+                    if total:
+                        yield b','
+                    yield orjson.dumps(event, default=_orjson_default, option=_ORJSON_OPTIONS)
+                    total += 1
+                yield b'],"total":%d,"limit":%d,"offset":%d}' % (total, limit, offset)
+            except Exception:
+                # Status is already sent; the client sees a truncated body
+                logger.exception("Audit event stream failed after %d events", total)
+                raise
+            finally:
+                await events.aclose()
+
+        return StreamingResponse(_stream_events(), media_type="application/json")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get audit events: {str(e)}")
 
 
-@app.get("/audit/dashboard", response_model=dict)
+@app.get("/audit/dashboard")
 async def get_audit_dashboard(
     days: int = Query(30, ge=1, le=365, description="Number of days to include"),
     current_user: User = Depends(require_role(["admin"]))
@@ -2721,13 +3078,6 @@ async def get_audit_dashboard(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Get recent events
-        recent_events = await audit_logger.get_audit_trail(
-            start_date=start_date,
-            end_date=end_date,
-            limit=50
-        )
-        
         # Get basic statistics
         stats_query = """
         SELECT 
@@ -2740,8 +3090,6 @@ async def get_audit_dashboard(
         FROM audit_events 
         WHERE created_at >= %s
         """
-        stats_result = await execute(stats_query, [start_date])
-        stats = stats_result[0] if stats_result else {}
         
         # Get event trends by day
         trends_query = """
@@ -2755,7 +3103,6 @@ async def get_audit_dashboard(
         GROUP BY DATE(created_at)
         ORDER BY event_date
         """
-        trends_result = await execute(trends_query, [start_date])
         
         # Get top users by activity
         users_query = """
@@ -2769,9 +3116,32 @@ async def get_audit_dashboard(
         ORDER BY action_count DESC
         LIMIT 10
         """
-        users_result = await execute(users_query, [start_date])
         
-        return {
+        # The aggregations and the recent events read independent slices of
+        # audit_events, so issue them concurrently on separate pool connections;
+        # the task group cancels the rest as soon as one of them fails
+        try:
+            async with asyncio.TaskGroup() as tg:
+                recent_task = tg.create_task(audit_logger.get_audit_trail(
+                    start_date=start_date,
+                    end_date=end_date,
+                    limit=10
+                ))
+                stats_task = tg.create_task(execute(stats_query, [start_date]))
+                trends_task = tg.create_task(execute(trends_query, [start_date]))
+                users_task = tg.create_task(execute(users_query, [start_date]))
+        except ExceptionGroup as eg:
+            # Report the failing query itself, not the group wrapping it
+            cause = eg.exceptions[0]
+            logger.error("Audit dashboard query failed: %s", cause, exc_info=cause)
+            raise cause from None
+        recent_events = recent_task.result()
+        stats_result = stats_task.result()
+        trends_result = trends_task.result()
+        users_result = users_task.result()
+        stats = stats_result[0] if stats_result else {}
+        
+        return AppORJSONResponse(content={
             "period_days": days,
             "statistics": {
                 "total_events": stats.get('total_events', 0),
@@ -2781,10 +3151,10 @@ async def get_audit_dashboard(
                 "compliance_events": stats.get('compliance_events', 0),
                 "security_events": stats.get('security_events', 0)
             },
-            "trends": [dict(row) for row in trends_result or []],
-            "top_users": [dict(row) for row in users_result or []],
-            "recent_events": recent_events[:10]  # Latest 10 events
-        }
+            "trends": trends_result or [],
+            "top_users": users_result or [],
+            "recent_events": recent_events  # Latest 10 events
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get audit dashboard: {str(e)}")
@@ -2798,8 +3168,8 @@ async def generate_compliance_report(
     """Generate a compliance report"""
     
     try:
-        start_date = datetime.fromisoformat(request.start_date)
-        end_date = datetime.fromisoformat(request.end_date)
+        start_date = _parse_iso(request.start_date)
+        end_date = _parse_iso(request.end_date)
         
         report_id = await audit_logger.generate_compliance_report(
             report_type=ReportType(request.report_type),
@@ -2823,14 +3193,19 @@ async def generate_compliance_report(
         raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
 
 
-@app.get("/audit/reports", response_model=dict)
+@app.get("/audit/reports")
 async def get_compliance_reports(
     report_type: str = Query(None, description="Filter by report type"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str = Query(None, description="Keyset cursor from a previous page's next_cursor; overrides offset"),
     current_user: User = Depends(require_role(["admin"]))
 ):
-    """Get generated compliance reports"""
+    """Get generated compliance reports.
+
+    ``total`` counts every report matching the filters (from the cursor onwards
+    when paging by ``cursor``), computed in the same query via a window.
+    """
     
     try:
         conditions = ["1=1"]
@@ -2840,37 +3215,51 @@ async def get_compliance_reports(
             conditions.append("report_type = %s")
             params.append(report_type)
         
+        if cursor:
+            # Keyset predicate seeks straight to the page instead of scanning OFFSET rows
+            try:
+                cursor_created_at, cursor_report_id = cursor.split("|", 1)
+                cursor_params = [_parse_iso(cursor_created_at), cursor_report_id]
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            conditions.append("(created_at, report_id) < (%s, %s)")
+            params.extend(cursor_params)
+            offset = 0
+        
         where_clause = " AND ".join(conditions)
         
         query = f"""
         SELECT report_id, report_type, title, generated_by, generated_for,
                date_range_start, date_range_end, compliance_score, risk_score,
-               status, created_at
+               status, created_at, COUNT(*) OVER() AS total_count
         FROM compliance_reports 
         WHERE {where_clause}
-        ORDER BY created_at DESC
+        ORDER BY created_at DESC, report_id DESC
         LIMIT %s OFFSET %s
         """
         params.extend([limit, offset])
         
-        result = await execute(query, params)
+        # DictCursor rows are already plain dicts; serialize them as-is
+        reports = await execute(query, params) or []
+        total = reports[0]["total_count"] if reports else 0
+        for report in reports:
+            del report["total_count"]
         
-        reports = []
-        for row in result or []:
-            report = dict(row)
-            # Convert datetime fields to strings
-            for field in ['date_range_start', 'date_range_end', 'created_at']:
-                if report[field]:
-                    report[field] = report[field].isoformat()
-            reports.append(report)
+        next_cursor = None
+        if len(reports) == limit:
+            last = reports[-1]
+            next_cursor = f"{last['created_at'].isoformat()}|{last['report_id']}"
         
-        return {
+        return AppORJSONResponse(content={
             "reports": reports,
-            "total": len(reports),
+            "total": total,
             "limit": limit,
-            "offset": offset
-        }
+            "offset": offset,
+            "next_cursor": next_cursor
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get reports: {str(e)}")
 
@@ -2891,22 +3280,20 @@ async def get_compliance_report(
         if not result:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        report = dict(result[0])
+        report = result[0]
         
         # Parse JSON fields
         for field in ['metrics', 'findings', 'recommendations', 'filters']:
             if report[field]:
                 try:
-                    report[field] = json.loads(report[field])
-                except:
+                    report[field] = orjson.loads(report[field])
+                except orjson.JSONDecodeError:
                     report[field] = {}
         
-        # Convert datetime fields to strings
-        for field in ['date_range_start', 'date_range_end', 'created_at', 'updated_at']:
-            if report[field]:
-                report[field] = report[field].isoformat()
-        
-        return report
+        # The row was validated on the write path; model_construct trims it to the
+        # response schema without re-running validation
+        report_out = ComplianceReportOut.model_construct(**report)
+        return AppORJSONResponse(content=report_out.model_dump(warnings=False))
         
     except HTTPException:
         raise
@@ -2922,17 +3309,13 @@ async def delete_compliance_report(
     """Delete a compliance report"""
     
     try:
-        # Check if report exists
-        check_query = "SELECT report_id FROM compliance_reports WHERE report_id = %s"
-        check_result = await execute(check_query, [report_id])
+        # Delete the report; zero affected rows means it never existed
+        delete_query = "DELETE FROM compliance_reports WHERE report_id = %s"
+        deleted = await execute_rowcount(delete_query, [report_id])
         
-        if not check_result:
+        if not deleted:
             raise HTTPException(status_code=404, detail="Report not found")
         
-        # Delete the report
-        delete_query = "DELETE FROM compliance_reports WHERE report_id = %s"
-        await execute(delete_query, [report_id])
-        
         return {"status": "deleted", "report_id": report_id}
         
     except HTTPException:
@@ -2942,37 +3325,25 @@ async def delete_compliance_report(
 
 
 # Recommendation endpoints
-@app.get("/recommendations", response_model=RecommendationsResponse)
+@router.get("/recommendations", response_model=RecommendationsResponse)
 async def get_user_recommendations(
     limit: int = Query(default=10, ge=1, le=50),
-    types: str = Query(default="", description="Comma-separated recommendation types"),
+    types: list[RecommendationType] | None = Query(default=None, description="Recommendation types (repeat the parameter for several)"),
     context_document_id: int = Query(default=None, description="Context document for similar recommendations"),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get personalized recommendations for the current user"""
     
     try:
-        # Parse recommendation types
-        recommendation_types = None
-        if types:
-            type_list = [t.strip() for t in types.split(",") if t.strip()]
-            recommendation_types = []
-            for t in type_list:
-                try:
-                    recommendation_types.append(RecommendationType(t))
-                except ValueError:
-                    pass  # Skip invalid types
-        
-        # Get recommendations
-        recommendations = await recommendation_engine.get_recommendations(
+        # Get recommendations together with the (cached) profile they were built from
+        recommendations, user_profile = await recommendation_engine.get_recommendations_with_profile(
             user_id=current_user.username,
             limit=limit,
-            recommendation_types=recommendation_types,
+            recommendation_types=types,
             context_document_id=context_document_id
         )
         
         # Build user profile summary for debugging/transparency
-        user_profile = await recommendation_engine._build_user_profile(current_user.username)
         profile_summary = {
             "interaction_count": user_profile.get("interaction_count", 0),
             "preferred_topics": list(user_profile.get("preferred_topics", {}).keys())[:5],
@@ -2980,10 +3351,9 @@ async def get_user_recommendations(
             "engagement_level": user_profile.get("engagement_level", 0.5)
         }
         
-        # Convert to response format
-        recommendation_list = []
-        for rec in recommendations:
-            recommendation_list.append(RecommendationOut(
+        # Engine output is trusted, so skip re-validation and serialize directly
+        recommendation_list = [
+            RecommendationOut.model_construct(
                 recommendation_id=rec.recommendation_id,
                 document_id=rec.document_id,
                 title=rec.title,
@@ -2993,19 +3363,21 @@ async def get_user_recommendations(
                 reasoning=rec.reasoning,
                 source_document_id=rec.source_document_id,
                 metadata=rec.metadata
-            ))
+            ).model_dump(warnings=False)
+            for rec in recommendations
+        ]
         
-        return RecommendationsResponse(
-            recommendations=recommendation_list,
-            total=len(recommendation_list),
-            user_profile_summary=profile_summary
-        )
+        return AppORJSONResponse({
+            "recommendations": recommendation_list,
+            "total": len(recommendation_list),
+            "user_profile_summary": profile_summary
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get recommendations: {str(e)}")
 
 
-@app.post("/recommendations/interaction", response_model=dict)
+@router.post("/recommendations/interaction", response_model=dict)
 async def track_document_interaction(
     interaction: InteractionTrackingIn,
     current_user: User = Depends(get_current_active_user)
@@ -3013,27 +3385,26 @@ async def track_document_interaction(
     """Track user interaction with a document for better recommendations"""
     
     try:
-        # Validate interaction type and depth
-        try:
-            interaction_type = InteractionType(interaction.interaction_type)
-            interaction_depth = InteractionDepth(interaction.depth)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"Invalid interaction type or depth: {str(e)}")
+        interaction_type = interaction.interaction_type
+        interaction_depth = interaction.depth
         
-        # Track the interaction
-        await recommendation_engine.track_interaction(
-            user_id=current_user.username,
-            document_id=interaction.document_id,
-            interaction_type=interaction_type,
-            duration_seconds=interaction.duration_seconds,
-            depth=interaction_depth,
-            session_id=interaction.session_id,
-            referrer_source=interaction.referrer_source,
-            metadata=interaction.metadata
-        )
+        # Track the interaction; stored in batches by _interaction_worker
+        try:
+            app.state.interaction_queue.put_nowait(UserInteraction(
+                user_id=current_user.username,
+                document_id=interaction.document_id,
+                interaction_type=interaction_type,
+                duration_seconds=interaction.duration_seconds,
+                depth=interaction_depth,
+                session_id=interaction.session_id,
+                referrer_source=interaction.referrer_source,
+                metadata=interaction.metadata
+            ))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Interaction queue is full, retry later")
         
-        # Log audit event
-        await audit_logger.log_event(
+        # Log audit event in the background
+        _enqueue_audit_event(
             event_type=EventType.USER_ACTION,
             action=Action.READ if interaction_type == InteractionType.VIEW else Action.ACCESS,
             resource_type=ResourceType.DOCUMENT,
@@ -3053,7 +3424,7 @@ async def track_document_interaction(
         raise HTTPException(status_code=500, detail=f"Failed to track interaction: {str(e)}")
 
 
-@app.post("/recommendations/feedback", response_model=dict)
+@router.post("/recommendations/feedback", response_model=dict)
 async def provide_recommendation_feedback(
     feedback: RecommendationFeedbackIn,
     current_user: User = Depends(get_current_active_user)
@@ -3061,14 +3432,12 @@ async def provide_recommendation_feedback(
     """Provide feedback on a recommendation to improve future suggestions"""
     
     try:
-        if not 1 <= feedback.rating <= 5:
-            raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
-        
         await recommendation_engine.provide_feedback(
             recommendation_id=feedback.recommendation_id,
             rating=feedback.rating,
             notes=feedback.notes
         )
+        recommendation_engine.invalidate_user_profile(current_user.username)
         
         return {
             "status": "feedback_recorded",
@@ -3082,56 +3451,143 @@ async def provide_recommendation_feedback(
         raise HTTPException(status_code=500, detail=f"Failed to record feedback: {str(e)}")
 
 
-@app.get("/recommendations/preferences", response_model=UserPreferencesOut)
+# Only the columns UserPreferencesOut needs
+_SQL_GET_PREFS = """
+    SELECT user_id, preferred_recommendation_types, excluded_topics,
+           preferred_compliance_frameworks, recommendation_frequency,
+           max_recommendations_per_session, enable_ai_explanations,
+           enable_trend_based, enable_collaborative_filtering
+    FROM user_recommendation_preferences 
+    WHERE user_id = %s
+"""
+
+
+_SQL_UPSERT_PREFS = """
+    INSERT INTO user_recommendation_preferences 
+    (user_id, preferred_recommendation_types, excluded_topics, 
+     preferred_compliance_frameworks, recommendation_frequency,
+     max_recommendations_per_session, enable_ai_explanations,
+     enable_trend_based, enable_collaborative_filtering)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        preferred_recommendation_types = VALUES(preferred_recommendation_types),
+        excluded_topics = VALUES(excluded_topics),
+        preferred_compliance_frameworks = VALUES(preferred_compliance_frameworks),
+        recommendation_frequency = VALUES(recommendation_frequency),
+        max_recommendations_per_session = VALUES(max_recommendations_per_session),
+        enable_ai_explanations = VALUES(enable_ai_explanations),
+        enable_trend_based = VALUES(enable_trend_based),
+        enable_collaborative_filtering = VALUES(enable_collaborative_filtering),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# One scan of the date window; each aggregation is tagged with its section
+_SQL_ANALYTICS = """
+    WITH base AS (
+        SELECT user_id, recommendation_type, clicked_at, feedback_rating
+        FROM document_recommendations 
+        WHERE generated_at >= %s AND generated_at <= %s
+    )
+    SELECT 'overall' as section, NULL as recommendation_type,
+           COUNT(*) as total,
+           COUNT(clicked_at) as clicks,
+           AVG(feedback_rating) as avg_a,
+           NULL as avg_b
+    FROM base
+    UNION ALL
+    SELECT 'by_type', recommendation_type, COUNT(*), COUNT(clicked_at), NULL, NULL
+    FROM base
+    GROUP BY recommendation_type
+    UNION ALL
+    -- Per-user averages without a GROUP BY temp table: each click is weighted
+    -- by 1/rows-for-that-user, so the sum equals the sum of per-user click rates
+    SELECT 'engagement', NULL, COUNT(DISTINCT user_id), NULL,
+           COUNT(*) / COUNT(DISTINCT user_id),
+           SUM(CASE WHEN clicked_at IS NOT NULL THEN 1.0 / user_rows ELSE 0.0 END)
+               / COUNT(DISTINCT user_id)
+    FROM (
+        SELECT user_id, clicked_at,
+               COUNT(*) OVER (PARTITION BY user_id) as user_rows
+        FROM base
+    ) per_user
+"""
+
+
+# Served to users who have not saved preferences yet
+_DEFAULT_PREFERENCES = UserPreferencesOut(
+    user_id="",
+    preferred_recommendation_types=["personalized", "compliance_related", "trending"],
+    excluded_topics=[],
+    preferred_compliance_frameworks=["GDPR", "SOX"],
+    recommendation_frequency="real_time",
+    max_recommendations_per_session=5,
+    enable_ai_explanations=True,
+    enable_trend_based=True,
+    enable_collaborative_filtering=True
+)
+
+
+def _json_list(values: list[str] | None) -> str:
+    # JSON columns reject binary-charset values, so the driver needs str, not orjson's bytes
+    return orjson.dumps(values).decode() if values else "[]"
+
+
+def _preferences_params(user_id: str, preferences: UserPreferencesIn) -> tuple:
+    # Positional parameters for _SQL_UPSERT_PREFS
+    return (
+        user_id,
+        _json_list(preferences.preferred_recommendation_types),
+        _json_list(preferences.excluded_topics),
+        _json_list(preferences.preferred_compliance_frameworks),
+        preferences.recommendation_frequency,
+        preferences.max_recommendations_per_session,
+        preferences.enable_ai_explanations,
+        preferences.enable_trend_based,
+        preferences.enable_collaborative_filtering
+    )
+
+
+def _preferences_from_row(row: dict) -> UserPreferencesOut:
+    # The pool's cursor class is DictCursor, so columns are looked up by name
+    return UserPreferencesOut(
+        user_id=row["user_id"],
+        preferred_recommendation_types=_loads(row["preferred_recommendation_types"], []),
+        excluded_topics=_loads(row["excluded_topics"], []),
+        preferred_compliance_frameworks=_loads(row["preferred_compliance_frameworks"], []),
+        recommendation_frequency=row["recommendation_frequency"] or 'real_time',
+        max_recommendations_per_session=row["max_recommendations_per_session"] or 5,
+        enable_ai_explanations=bool(row["enable_ai_explanations"]),
+        enable_trend_based=bool(row["enable_trend_based"]),
+        enable_collaborative_filtering=bool(row["enable_collaborative_filtering"])
+    )
+
+
+@router.get("/recommendations/preferences", response_model=UserPreferencesOut)
 async def get_user_recommendation_preferences(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user's recommendation preferences"""
     
     try:
-        from .deps import get_pool
         pool = await get_pool()
         
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute("""
-                    SELECT * FROM user_recommendation_preferences 
-                    WHERE user_id = %s
-                """, (current_user.username,))
+                await cursor.execute(_SQL_GET_PREFS, (current_user.username,))
                 
                 result = await cursor.fetchone()
                 
                 if result:
-                    return UserPreferencesOut(
-                        user_id=result[1],  # user_id
-                        preferred_recommendation_types=json.loads(result[2] or '[]'),
-                        excluded_topics=json.loads(result[3] or '[]'),
-                        preferred_compliance_frameworks=json.loads(result[4] or '[]'),
-                        recommendation_frequency=result[5] or 'real_time',
-                        max_recommendations_per_session=result[6] or 5,
-                        enable_ai_explanations=bool(result[7]),
-                        enable_trend_based=bool(result[8]),
-                        enable_collaborative_filtering=bool(result[9])
-                    )
+                    return _preferences_from_row(result)
                 else:
                     # Return default preferences
-                    return UserPreferencesOut(
-                        user_id=current_user.username,
-                        preferred_recommendation_types=["personalized", "compliance_related", "trending"],
-                        excluded_topics=[],
-                        preferred_compliance_frameworks=["GDPR", "SOX"],
-                        recommendation_frequency="real_time",
-                        max_recommendations_per_session=5,
-                        enable_ai_explanations=True,
-                        enable_trend_based=True,
-                        enable_collaborative_filtering=True
-                    )
+                    return _DEFAULT_PREFERENCES.model_copy(update={"user_id": current_user.username})
                     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get preferences: {str(e)}")
 
 
-@app.put("/recommendations/preferences", response_model=UserPreferencesOut)
+@router.put("/recommendations/preferences", response_model=UserPreferencesOut)
 async def update_user_recommendation_preferences(
     preferences: UserPreferencesIn,
     current_user: User = Depends(get_current_active_user)
@@ -3139,186 +3595,205 @@ async def update_user_recommendation_preferences(
     """Update user's recommendation preferences"""
     
     try:
-        from .deps import get_pool
         pool = await get_pool()
         
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 # Upsert preferences
-                await cursor.execute("""
-                    INSERT INTO user_recommendation_preferences 
-                    (user_id, preferred_recommendation_types, excluded_topics, 
-                     preferred_compliance_frameworks, recommendation_frequency,
-                     max_recommendations_per_session, enable_ai_explanations,
-                     enable_trend_based, enable_collaborative_filtering)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON DUPLICATE KEY UPDATE
-                        preferred_recommendation_types = VALUES(preferred_recommendation_types),
-                        excluded_topics = VALUES(excluded_topics),
-                        preferred_compliance_frameworks = VALUES(preferred_compliance_frameworks),
-                        recommendation_frequency = VALUES(recommendation_frequency),
-                        max_recommendations_per_session = VALUES(max_recommendations_per_session),
-                        enable_ai_explanations = VALUES(enable_ai_explanations),
-                        enable_trend_based = VALUES(enable_trend_based),
-                        enable_collaborative_filtering = VALUES(enable_collaborative_filtering),
-                        updated_at = CURRENT_TIMESTAMP
-                """, (
-                    current_user.username,
-                    json.dumps(preferences.preferred_recommendation_types or []),
-                    json.dumps(preferences.excluded_topics or []),
-                    json.dumps(preferences.preferred_compliance_frameworks or []),
-                    preferences.recommendation_frequency,
-                    preferences.max_recommendations_per_session,
-                    preferences.enable_ai_explanations,
-                    preferences.enable_trend_based,
-                    preferences.enable_collaborative_filtering
-                ))
+                await cursor.execute(
+                    _SQL_UPSERT_PREFS, _preferences_params(current_user.username, preferences)
+                )
                 await conn.commit()
+                
+                # Read the stored row back on the same connection
+                await cursor.execute(_SQL_GET_PREFS, (current_user.username,))
+                
+                return _preferences_from_row(await cursor.fetchone())
         
-        # Return updated preferences
-        return await get_user_recommendation_preferences(current_user)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update preferences: {str(e)}")
+
+
+@router.post("/recommendations/preferences/bulk", response_model=dict)
+async def bulk_update_recommendation_preferences(
+    items: list[UserPreferencesBulkItemIn] = Body(..., max_length=1000),
+    current_user: User = Depends(require_role(["admin"]))
+):
+    """Upsert recommendation preferences for many users in one batched statement"""
+    
+    # One row per user; a repeated user_id would silently depend on row order
+    user_ids = [item.user_id for item in items]
+    if len(set(user_ids)) != len(user_ids):
+        raise HTTPException(status_code=400, detail="Duplicate user_id in bulk preferences")
+    
+    try:
+        await execute_many(
+            _SQL_UPSERT_PREFS, [_preferences_params(item.user_id, item) for item in items]
+        )
+        # MySQL's affected-row count for upserts (1 insert, 2 update, 0 unchanged)
+        # is not a row count, so report how many users were submitted
+        return {"status": "updated", "submitted": len(items)}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update preferences: {str(e)}")
 
 
-@app.get("/recommendations/analytics", response_model=RecommendationAnalyticsOut)
+@router.get("/recommendations/analytics", response_model=RecommendationAnalyticsOut)
 async def get_recommendation_analytics(
     days: int = Query(default=30, ge=1, le=365),
     current_user: User = Depends(require_role(["admin", "analyst"]))
 ):
     """Get recommendation system analytics"""
     
+    # Results are shared for the whole minute; the data only grows append-style
+    cache_key = f"rec_analytics:{days}:{int(time.time() // 60)}"
+    redis_client = app.state.redis
+    if redis_client is not None:
+        try:
+            cached = await redis_client.get(cache_key)
+            if cached:
+                return Response(content=cached, media_type="application/json")
+        except Exception as e:
+            logger.warning("Analytics cache read failed: %s", e)
+    
     try:
-        from datetime import datetime, timedelta
-        
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        from .deps import get_pool
         pool = await get_pool()
         
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                # Get overall analytics
-                await cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total_recommendations,
-                        COUNT(CASE WHEN clicked_at IS NOT NULL THEN 1 END) as clicked_count,
-                        COUNT(CASE WHEN feedback_rating IS NOT NULL THEN 1 END) as feedback_count,
-                        AVG(CASE WHEN feedback_rating IS NOT NULL THEN feedback_rating END) as avg_rating
-                    FROM document_recommendations 
-                    WHERE generated_at >= %s AND generated_at <= %s
-                """, (start_date, end_date))
-                
-                analytics_result = await cursor.fetchone()
-                
-                total_recs = analytics_result[0] or 0
-                clicked_count = analytics_result[1] or 0
-                feedback_count = analytics_result[2] or 0
-                avg_rating = float(analytics_result[3] or 0)
-                
-                ctr = (clicked_count / total_recs) if total_recs > 0 else 0
-                
-                # Get top recommendation types
-                await cursor.execute("""
-                    SELECT recommendation_type, COUNT(*) as count,
-                           COUNT(CASE WHEN clicked_at IS NOT NULL THEN 1 END) as clicks
-                    FROM document_recommendations 
-                    WHERE generated_at >= %s AND generated_at <= %s
-                    GROUP BY recommendation_type
-                    ORDER BY count DESC
-                """, (start_date, end_date))
+                await cursor.execute(_SQL_ANALYTICS, (start_date, end_date))
                 
-                type_results = await cursor.fetchall()
-                top_types = []
-                for row in type_results:
-                    type_ctr = (row[2] / row[1]) if row[1] > 0 else 0
-                    top_types.append({
-                        "type": row[0],
-                        "count": row[1],
-                        "clicks": row[2],
-                        "click_through_rate": type_ctr
-                    })
-                
-                # Get user engagement metrics
-                await cursor.execute("""
-                    SELECT 
-                        COUNT(DISTINCT user_id) as active_users,
-                        AVG(interaction_count) as avg_interactions_per_user,
-                        AVG(engagement_level) as avg_engagement_level
-                    FROM (
-                        SELECT r.user_id, COUNT(r.id) as interaction_count,
-                               AVG(CASE WHEN r.clicked_at IS NOT NULL THEN 1.0 ELSE 0.0 END) as engagement_level
-                        FROM document_recommendations r
-                        WHERE r.generated_at >= %s AND r.generated_at <= %s
-                        GROUP BY r.user_id
-                    ) user_stats
-                """, (start_date, end_date))
-                
-                engagement_result = await cursor.fetchone()
-                
-                return RecommendationAnalyticsOut(
-                    date_range={
-                        "start": start_date.isoformat(),
-                        "end": end_date.isoformat(),
-                        "days": days
-                    },
-                    total_recommendations=total_recs,
-                    click_through_rate=round(ctr, 4),
-                    average_rating=round(avg_rating, 2),
-                    top_recommendation_types=top_types,
-                    user_engagement_metrics={
-                        "active_users": engagement_result[0] or 0,
-                        "avg_interactions_per_user": float(engagement_result[1] or 0),
-                        "avg_engagement_level": float(engagement_result[2] or 0)
-                    }
-                )
+                rows = await cursor.fetchall()
+        
+        analytics_result = next(row for row in rows if row["section"] == "overall")
+        engagement_result = next(row for row in rows if row["section"] == "engagement")
+        type_results = sorted(
+            (row for row in rows if row["section"] == "by_type"),
+            key=lambda row: row["total"], reverse=True
+        )
+        
+        total_recs = analytics_result["total"] or 0
+        clicked_count = analytics_result["clicks"] or 0
+        avg_rating = float(analytics_result["avg_a"] or 0)
+        
+        ctr = (clicked_count / total_recs) if total_recs > 0 else 0
+        
+        top_types = []
+        for row in type_results:
+            type_ctr = (row["clicks"] / row["total"]) if row["total"] > 0 else 0
+            top_types.append({
+                "type": row["recommendation_type"],
+                "count": row["total"],
+                "clicks": row["clicks"],
+                "click_through_rate": type_ctr
+            })
+        
+        analytics = RecommendationAnalyticsOut(
+            date_range={
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat(),
+                "days": days
+            },
+            total_recommendations=total_recs,
+            click_through_rate=round(ctr, 4),
+            average_rating=round(avg_rating, 2),
+            top_recommendation_types=top_types,
+            user_engagement_metrics={
+                "active_users": engagement_result["total"] or 0,
+                "avg_interactions_per_user": float(engagement_result["avg_a"] or 0),
+                "avg_engagement_level": float(engagement_result["avg_b"] or 0)
+            }
+        )
                 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
+    
+    payload = analytics.model_dump_json()
+    if redis_client is not None:
+        try:
+            await redis_client.set(cache_key, payload, ex=120)
+        except Exception as e:
+            logger.warning("Analytics cache write failed: %s", e)
+    return Response(content=payload, media_type="application/json")
+
+
+_HEALTH_OK = orjson.dumps({"ok": True})
 
 
 @app.get("/health", response_model=HealthOut)
 async def health():
-    return {"ok": True}
+    # Constant body, encoded once at import
+    return Response(content=_HEALTH_OK, media_type="application/json")
 
 
-@app.get("/health/full", response_model=HealthFullOut)
-async def health_full():
-    db_ok = True
-    llm_ok = True
-    embed_ok = False
+# GET/HEAD /healthz are answered by LivenessProbeMiddleware; the route lets other
+# methods get the router's normal 405
+app.add_api_route("/healthz", health, methods=["GET"], include_in_schema=False)
+
+
+async def _check_db() -> bool:
     try:
         await execute("SELECT 1", [])
+        return True
     except Exception:
-        db_ok = False
+        return False
+
+
+# A hung Ollama should fail the probe fast: /health/full stays around 1s worst case
+# instead of waiting out the shared client's 5s default
+_HEALTH_PROBE_TIMEOUT = httpx.Timeout(connect=0.5, read=1.0, write=0.5, pool=0.5)
+
+
+async def _check_llm() -> bool:
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
-            r = await client.get(_ollama_url() + "/api/tags")
-            llm_ok = r.status_code == 200
+        # Ollama answers HEAD / with 200 when up; avoids fetching the full /api/tags model list
+        r = await app.state.http.head(_ollama_url() + "/", timeout=_HEALTH_PROBE_TIMEOUT)
+        return r.status_code == 200
     except Exception:
-        llm_ok = False
+        return False
+
+
+async def _check_embed() -> bool:
     try:
-        embed_ok = is_model_available()
+        # May load the sentence-transformers model on first call; keep it off the event loop
+        return await asyncio.to_thread(is_model_available)
     except Exception:
-        embed_ok = False
-    return {"api": True, "db": db_ok, "llm": llm_ok, "embed": embed_ok}
+        return False
 
 
-# Minimal API versioning: expose health under /api/v1
-api_v1 = APIRouter(prefix="/api/v1")
+_HEALTH_FULL_TTL = 2.0
+_health_full_cache: tuple[float, bytes] | None = None
+_health_full_lock = asyncio.Lock()
+
 
-@api_v1.get("/health")
-async def v1_health():
-    return await health()  # type: ignore
+@app.get("/health/full", response_model=HealthFullOut)
+async def health_full():
+    """Probe results are reused for a couple of seconds; concurrent probes share one check."""
+    global _health_full_cache
+    async with _health_full_lock:
+        now = time.monotonic()
+        if _health_full_cache is None or now - _health_full_cache[0] >= _HEALTH_FULL_TTL:
+            # Probes are independent, so latency is the slowest probe rather than their sum
+            db_ok, llm_ok, embed_ok = await asyncio.gather(_check_db(), _check_llm(), _check_embed())
+            payload = orjson.dumps({"api": True, "db": db_ok, "llm": llm_ok, "embed": embed_ok})
+            _health_full_cache = (time.monotonic(), payload)
+        # Cached probes are served as the already-encoded bytes
+        return Response(content=_health_full_cache[1], media_type="application/json")
 
-@api_v1.get("/health/full")
-async def v1_health_full():
-    return await health_full()  # type: ignore
+
+# Minimal API versioning: expose health under /api/v1
+api_v1 = APIRouter(prefix="/api/v1")
+api_v1.add_api_route("/health", health, methods=["GET"], response_model=HealthOut)
+api_v1.add_api_route("/health/full", health_full, methods=["GET"], response_model=HealthFullOut)
 
 app.include_router(api_v1)
 
+# Core endpoints; _VersionedRoute also answers them under /api/v1
+app.include_router(router)
+
 # Include TiDB Serverless enhanced endpoints
 app.include_router(serverless_router)
 
@@ -3337,42 +3812,15 @@ app.include_router(graph_router)
 # Include Enhanced Document Library endpoints
 app.include_router(document_library_router)
 
-def _v1(alias: str, func, methods: list[str]):
-    app.add_api_route("/api/v1" + alias, func, methods=methods)
-
-_v1("/ingest/reg", ingest_reg, ["POST"])  # legacy alias
-_v1("/ingest/doc", ingest_doc, ["POST"])  # legacy alias
-_v1("/ingest/pdf", ingest_pdf, ["POST"])   # legacy alias
-_v1("/query/hybrid", query_hybrid, ["POST"])
-_v1("/action/task", action_task, ["POST"])
-_v1("/ai/explain", ai_explain, ["POST"])
-_v1("/ai/fix-it", ai_fix_it, ["POST"])
-_v1("/recent-documents", get_recent_documents, ["GET"])
-_v1("/documents", list_documents, ["GET"])
-_v1("/documents/{path:path}", read_document, ["GET"])
-_v1("/documents/{path:path}", update_document_meta, ["PATCH"])
-_v1("/documents/{path:path}", delete_document, ["DELETE"])
-_v1("/mappings", create_mapping, ["POST"])
-_v1("/coverage", coverage, ["GET"])
-_v1("/coverage/{reg_id}", coverage_detail, ["GET"])
-_v1("/auth/login", login_for_access_token, ["POST"])
-_v1("/auth/me", read_users_me, ["GET"])
-_v1("/auth/register", register_user, ["POST"])
-_v1("/auth/users", list_users, ["GET"])
-_v1("/auth/users/{username}", update_user, ["PATCH"])
-_v1("/auth/users/{username}", delete_user, ["DELETE"])
-_v1("/auth/password", update_password, ["PATCH"])
-_v1("/chat", send_chat_message, ["POST"])
-_v1("/chat/conversations", get_conversations, ["GET"])
-_v1("/chat/conversations/{conversation_id}/messages", get_conversation_messages, ["GET"])
-_v1("/chat/conversations/{conversation_id}", delete_conversation, ["DELETE"])
-_v1("/compliance/analyze", analyze_document_compliance, ["POST"])
-_v1("/compliance/status/{doc_id}", get_document_compliance_status, ["GET"])
-_v1("/compliance/dashboard", get_compliance_dashboard, ["GET"])
-_v1("/compliance/frameworks", get_compliance_frameworks, ["GET"])
-_v1("/recommendations", get_user_recommendations, ["GET"])
-_v1("/recommendations/interaction", track_document_interaction, ["POST"])
-_v1("/recommendations/feedback", provide_recommendation_feedback, ["POST"])
-_v1("/recommendations/preferences", get_user_recommendation_preferences, ["GET"])
-_v1("/recommendations/preferences", update_user_recommendation_preferences, ["PUT"])
-_v1("/recommendations/analytics", get_recommendation_analytics, ["GET"])
+
+if __name__ == "__main__":
+    import importlib.util
+    import uvicorn
+    # uvicorn[standard] ships uvloop (not on Windows) and httptools; pin both explicitly
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools",
+    )
@@ -5,11 +5,38 @@ from starlette.responses import JSONResponse
 import uuid
 import time
 import logging
-from collections import defaultdict
-from typing import Dict, DefaultDict
+import math
+from typing import Dict, List
 
 logger = logging.getLogger(__name__)
 
+class LivenessProbeMiddleware:
+    """Answer ``GET``/``HEAD /healthz`` before any other middleware or routing runs.
+
+    Plain ASGI and registered outermost, so orchestrator liveness probes skip
+    CORS, rate limiting, logging and dependency resolution entirely. Other
+    methods fall through to the app's router, which answers 405. Use
+    ``/health/full`` when the DB and LLM should be checked.
+    """
+
+    _BODY = b'{"ok":true}'
+    _HEADERS = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(_BODY)).encode()),
+    ]
+
+    def __init__(self, app, path: str = "/healthz"):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == self.path and scope["method"] in ("GET", "HEAD"):
+            await send({"type": "http.response.start", "status": 200, "headers": self._HEADERS})
+            body = b"" if scope["method"] == "HEAD" else self._BODY
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
+
 class RequestIdMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         # Generate unique request ID
@@ -152,12 +179,20 @@ class ValidationMiddleware(BaseHTTPMiddleware):
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Per-IP token buckets: one refilling ``calls_per_minute`` per minute, one ``calls_per_hour`` per hour.
+
+    Each bucket starts full (so a client may burst up to its capacity) and refills
+    continuously; a request spends one token from both. State is three floats per IP.
+    """
+
     def __init__(self, app, calls_per_minute: int = 100, calls_per_hour: int = 1000):
         super().__init__(app)
         self.calls_per_minute = calls_per_minute
         self.calls_per_hour = calls_per_hour
-        # Format: ip -> [(timestamp, count_minute), (timestamp, count_hour)]
-        self.rate_limits: DefaultDict[str, Dict[str, list]] = defaultdict(lambda: {"minute": [], "hour": []})
+        self._minute_rate = calls_per_minute / 60.0
+        self._hour_rate = calls_per_hour / 3600.0
+        # Format: ip -> [minute_tokens, hour_tokens, last_refill_monotonic]
+        self.buckets: Dict[str, List[float]] = {}
     
     def _get_client_ip(self, request: Request) -> str:
         # Check for forwarded headers (for reverse proxy)
@@ -172,50 +207,47 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # Fallback to direct client IP
         return request.client.host if request.client else "unknown"
     
-    def _clean_old_requests(self, requests: list, window_seconds: int):
-        """Remove requests older than window_seconds"""
-        current_time = time.time()
-        return [req_time for req_time in requests if current_time - req_time < window_seconds]
-    
-    def _is_rate_limited(self, ip: str) -> tuple[bool, dict]:
-        current_time = time.time()
-        ip_data = self.rate_limits[ip]
-        
-        # Clean old requests and count current
-        ip_data["minute"] = self._clean_old_requests(ip_data["minute"], 60)
-        ip_data["hour"] = self._clean_old_requests(ip_data["hour"], 3600)
-        
-        minute_count = len(ip_data["minute"])
-        hour_count = len(ip_data["hour"])
+    def _take_token(self, ip: str) -> tuple[bool, dict, List[float]]:
+        now = time.monotonic()
+        bucket = self.buckets.get(ip)
+        if bucket is None:
+            bucket = self.buckets[ip] = [float(self.calls_per_minute), float(self.calls_per_hour), now]
+        else:
+            # Lazy refill for the time elapsed since the last request
+            elapsed = now - bucket[2]
+            bucket[0] = min(self.calls_per_minute, bucket[0] + elapsed * self._minute_rate)
+            bucket[1] = min(self.calls_per_hour, bucket[1] + elapsed * self._hour_rate)
+            bucket[2] = now
         
-        # Check limits
-        if minute_count >= self.calls_per_minute:
-            return True, {
-                "error": "rate_limit_exceeded",
-                "message": "Too many requests per minute",
-                "details": {
-                    "limit_per_minute": self.calls_per_minute,
-                    "limit_per_hour": self.calls_per_hour,
-                    "current_minute": minute_count,
-                    "current_hour": hour_count,
-                    "retry_after_seconds": 60 - (current_time - min(ip_data["minute"]))
-                }
-            }
+        if bucket[0] < 1:
+            return True, self._limit_error("Too many requests per minute", bucket, (1 - bucket[0]) / self._minute_rate), bucket
+        if bucket[1] < 1:
+            return True, self._limit_error("Too many requests per hour", bucket, (1 - bucket[1]) / self._hour_rate), bucket
         
-        if hour_count >= self.calls_per_hour:
-            return True, {
-                "error": "rate_limit_exceeded", 
-                "message": "Too many requests per hour",
-                "details": {
-                    "limit_per_minute": self.calls_per_minute,
-                    "limit_per_hour": self.calls_per_hour,
-                    "current_minute": minute_count,
-                    "current_hour": hour_count,
-                    "retry_after_seconds": 3600 - (current_time - min(ip_data["hour"]))
-                }
+        bucket[0] -= 1
+        bucket[1] -= 1
+        return False, {}, bucket
+    
+    def _limit_error(self, message: str, bucket: List[float], retry_after: float) -> dict:
+        return {
+            "error": "rate_limit_exceeded",
+            "message": message,
+            "details": {
+                "limit_per_minute": self.calls_per_minute,
+                "limit_per_hour": self.calls_per_hour,
+                "remaining_minute": int(bucket[0]),
+                "remaining_hour": int(bucket[1]),
+                "retry_after_seconds": retry_after
             }
-        
-        return False, {}
+        }
+    
+    def _rate_limit_headers(self, bucket: List[float]) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit-Minute": str(self.calls_per_minute),
+            "X-RateLimit-Limit-Hour": str(self.calls_per_hour),
+            "X-RateLimit-Remaining-Minute": str(int(bucket[0])),
+            "X-RateLimit-Remaining-Hour": str(int(bucket[1])),
+        }
     
     async def dispatch(self, request: Request, call_next):
         # Skip rate limiting for health checks
@@ -223,10 +255,9 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
         
         ip = self._get_client_ip(request)
-        current_time = time.time()
         
-        # Check if rate limited
-        is_limited, error_data = self._is_rate_limited(ip)
+        # Spend a token, or reject if either bucket is empty
+        is_limited, error_data, bucket = self._take_token(ip)
         
         if is_limited:
             logger.warning(f"Rate limit exceeded for IP {ip}: {error_data['message']}")
@@ -234,28 +265,14 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 status_code=429,
                 content=error_data,
                 headers={
-                    "Retry-After": str(int(error_data["details"]["retry_after_seconds"])),
-                    "X-RateLimit-Limit-Minute": str(self.calls_per_minute),
-                    "X-RateLimit-Limit-Hour": str(self.calls_per_hour),
-                    "X-RateLimit-Remaining-Minute": str(max(0, self.calls_per_minute - error_data["details"]["current_minute"])),
-                    "X-RateLimit-Remaining-Hour": str(max(0, self.calls_per_hour - error_data["details"]["current_hour"])),
+                    "Retry-After": str(math.ceil(error_data["details"]["retry_after_seconds"])),
+                    **self._rate_limit_headers(bucket),
                 }
             )
         
-        # Record this request
-        self.rate_limits[ip]["minute"].append(current_time)
-        self.rate_limits[ip]["hour"].append(current_time)
-        
         response = await call_next(request)
         
         # Add rate limit headers to response
-        ip_data = self.rate_limits[ip]
-        minute_count = len(ip_data["minute"])
-        hour_count = len(ip_data["hour"])
-        
-        response.headers["X-RateLimit-Limit-Minute"] = str(self.calls_per_minute)
-        response.headers["X-RateLimit-Limit-Hour"] = str(self.calls_per_hour)
-        response.headers["X-RateLimit-Remaining-Minute"] = str(max(0, self.calls_per_minute - minute_count))
-        response.headers["X-RateLimit-Remaining-Hour"] = str(max(0, self.calls_per_hour - hour_count))
+        response.headers.update(self._rate_limit_headers(bucket))
         
         return response
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""PDF text extraction run inside the PDF worker processes.
+
+Kept apart from main.py so spawned workers import only PyPDF2, not the whole API
+(torch, database pools, routers).
+"""
+
+import PyPDF2
+
+
+def extract_pdf_text(path: str) -> str:
+    reader = PyPDF2.PdfReader(path)
+    return "\n".join(page.extract_text() for page in reader.pages)
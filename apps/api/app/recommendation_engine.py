@@ -75,6 +75,7 @@ class RecommendationEngine:
     def __init__(self):
         self.similarity_cache = {}
         self.user_profile_cache = {}
+        self.user_profile_cache_maxsize = 10_000
         self.trending_cache = {}
         self.cache_ttl = 3600  # 1 hour cache
         
@@ -87,6 +88,20 @@ class RecommendationEngine:
     ) -> List[DocumentRecommendation]:
         """Get personalized recommendations for a user."""
         
+        recommendations, _ = await self.get_recommendations_with_profile(
+            user_id, limit, recommendation_types, context_document_id
+        )
+        return recommendations
+    
+    async def get_recommendations_with_profile(
+        self, 
+        user_id: str, 
+        limit: int = 10,
+        recommendation_types: Optional[List[RecommendationType]] = None,
+        context_document_id: Optional[int] = None
+    ) -> Tuple[List[DocumentRecommendation], Dict[str, Any]]:
+        """Get personalized recommendations along with the user profile they were built from."""
+        
         if not recommendation_types:
             recommendation_types = await self._get_user_preferred_types(user_id)
         
@@ -137,7 +152,7 @@ class RecommendationEngine:
         # Store recommendations in database
         await self._store_recommendations(unique_recommendations[:limit])
         
-        return unique_recommendations[:limit]
+        return unique_recommendations[:limit], user_profile
     
     async def track_interaction(
         self, 
@@ -158,31 +173,48 @@ class RecommendationEngine:
             referrer_source=kwargs.get('referrer_source'),
             metadata=kwargs.get('metadata', {})
         )
+        await self.track_interactions_bulk([interaction])
+    
+    _INSERT_INTERACTION_SQL = """
+        INSERT INTO user_document_interactions 
+        (user_id, document_id, interaction_type, interaction_duration_seconds,
+         interaction_depth, session_id, referrer_source, metadata)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    
+    async def track_interactions_bulk(self, interactions: List[UserInteraction]) -> None:
+        """Store several interactions with one multi-row INSERT."""
+        
+        if not interactions:
+            return
+        
+        rows = [
+            (
+                interaction.user_id,
+                interaction.document_id,
+                interaction.interaction_type.value,
+                interaction.duration_seconds,
+                interaction.depth.value,
+                interaction.session_id,
+                interaction.referrer_source,
+                json.dumps(interaction.metadata)
+            )
+            for interaction in interactions
+        ]
         
-        # Store interaction
         pool = await get_db_pool()
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute("""
-                    INSERT INTO user_document_interactions 
-                    (user_id, document_id, interaction_type, interaction_duration_seconds,
-                     interaction_depth, session_id, referrer_source, metadata)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    interaction.user_id,
-                    interaction.document_id,
-                    interaction.interaction_type.value,
-                    interaction.duration_seconds,
-                    interaction.depth.value,
-                    interaction.session_id,
-                    interaction.referrer_source,
-                    json.dumps(interaction.metadata)
-                ))
+                await cursor.executemany(self._INSERT_INTERACTION_SQL, rows)
                 await conn.commit()
         
         # Clear user profile cache for fresh recommendations
-        if user_id in self.user_profile_cache:
-            del self.user_profile_cache[user_id]
+        for user_id in {interaction.user_id for interaction in interactions}:
+            self.invalidate_user_profile(user_id)
+    
+    def invalidate_user_profile(self, user_id: str) -> None:
+        """Drop a cached user profile so the next request rebuilds it."""
+        self.user_profile_cache.pop(f"user_profile_{user_id}", None)
     
     async def provide_feedback(
         self, 
@@ -229,7 +261,9 @@ class RecommendationEngine:
                 interactions = await cursor.fetchall()
         
         if not interactions:
-            return self._get_default_profile()
+            profile = self._get_default_profile()
+            self._cache_user_profile(cache_key, profile)
+            return profile
         
         # Analyze interaction patterns
         profile = {
@@ -245,12 +279,42 @@ class RecommendationEngine:
         }
         
         # Cache the profile
+        self._cache_user_profile(cache_key, profile)
+        
+        return profile
+    
+    async def warm_user_profiles(self, limit: int = 500, days: int = 7) -> int:
+        """Pre-build profiles for the most active recent users; returns how many were warmed."""
+        
+        pool = await get_db_pool()
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute("""
+                    SELECT user_id
+                    FROM document_recommendations
+                    WHERE generated_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+                    GROUP BY user_id
+                    ORDER BY COUNT(*) DESC
+                    LIMIT %s
+                """, (days, limit))
+                
+                rows = await cursor.fetchall()
+        
+        # One at a time so warming never competes with live traffic for the whole pool
+        for row in rows:
+            await self._build_user_profile(row['user_id'])
+        
+        return len(rows)
+    
+    def _cache_user_profile(self, cache_key: str, profile: Dict[str, Any]) -> None:
+        """Store a profile, evicting the oldest entry once the cache is full."""
+        self.user_profile_cache.pop(cache_key, None)
+        if len(self.user_profile_cache) >= self.user_profile_cache_maxsize:
+            del self.user_profile_cache[next(iter(self.user_profile_cache))]
         self.user_profile_cache[cache_key] = {
             'profile': profile,
             'timestamp': datetime.now()
         }
-        
-        return profile
     
     def _extract_preferred_topics(self, interactions: List[Dict]) -> Dict[str, float]:
         """Extract user's preferred topics from interactions."""
@@ -344,7 +408,7 @@ class RecommendationEngine:
                     """, (user_id,))
                     result = await cursor.fetchone()
                     if result:
-                        base_document_id = result[0]
+                        base_document_id = result['document_id']
         
         if base_document_id:
             similar_docs = await self._find_similar_documents(base_document_id, limit * 2)
@@ -1002,9 +1066,9 @@ class RecommendationEngine:
                 """, (user_id,))
                 
                 result = await cursor.fetchone()
-                if result and result[0]:
+                if result and result['preferred_recommendation_types']:
                     try:
-                        pref_types = json.loads(result[0])
+                        pref_types = json.loads(result['preferred_recommendation_types'])
                         return [RecommendationType(t) for t in pref_types if t in RecommendationType.__members__]
                     except:
                         pass
@@ -1,47 +1,127 @@
 import os
 import sqlite3
 import time
+import asyncio
+import threading
 import logging
-from typing import Optional, Sequence, Any, List, Dict
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence, Any, List, Dict
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 
+# One writer connection shared by all threads (SQLite allows a single writer at a
+# time anyway), plus a read-only connection per thread so searches run in parallel
 _connection: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+_readers = threading.local()
+# Every reader opened, so close_connection can close them from any thread;
+# bumping _reader_epoch makes each thread open a fresh one on next use
+_all_readers: List[sqlite3.Connection] = []
+_reader_epoch = 0
+# Bumped after every committed write so callers can key caches on the data version
+_write_generation = 0
+
+# WAL lets readers proceed during writes; NORMAL sync skips the fsync on every commit
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",
+)
+
+def _apply_pragmas(conn: sqlite3.Connection, pragmas: Sequence[str] = _PRAGMAS) -> None:
+    for pragma in pragmas:
+        conn.execute(pragma)
+
+def _db_path() -> str:
+    db_path = os.getenv("TIDB_DATABASE", "lexmind.db")
+    if not db_path.endswith('.db'):
+        db_path += '.db'
+    return db_path
 
 def get_connection() -> sqlite3.Connection:
+    """The shared writer connection; hold ``_lock`` (or use get_write_conn) while using it"""
     global _connection
-    if _connection is None:
-        db_path = os.getenv("TIDB_DATABASE", "lexmind.db")
-        if not db_path.endswith('.db'):
-            db_path += '.db'
-        _connection = sqlite3.connect(db_path, check_same_thread=False)
-        _connection.row_factory = sqlite3.Row  # Enable dict-like access
-    return _connection
+    with _lock:
+        if _connection is None:
+            _connection = sqlite3.connect(_db_path(), check_same_thread=False, cached_statements=256)
+            _connection.row_factory = sqlite3.Row  # Enable dict-like access
+            _apply_pragmas(_connection)
+        return _connection
 
 def close_connection() -> None:
-    global _connection
-    if _connection is not None:
-        _connection.close()
-        _connection = None
+    """Close the writer and every thread's reader"""
+    global _connection, _reader_epoch
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
+        for reader in _all_readers:
+            reader.close()
+        _all_readers.clear()
+        _reader_epoch += 1
+
+def write_generation() -> int:
+    return _write_generation
+
+def _bump_write_generation() -> None:
+    global _write_generation
+    _write_generation += 1
+
+@contextmanager
+def get_write_conn() -> Iterator[sqlite3.Connection]:
+    """Exclusive use of the writer inside one IMMEDIATE transaction, committed on success"""
+    with _lock:
+        conn = get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        _bump_write_generation()
+
+@contextmanager
+def get_read_conn() -> Iterator[sqlite3.Connection]:
+    """This thread's read-only connection; WAL lets it read while the writer commits"""
+    # Keyed on the path too, so pointing TIDB_DATABASE elsewhere opens a new reader
+    key = (_db_path(), _reader_epoch)
+    conn = getattr(_readers, "conn", None)
+    if conn is None or getattr(_readers, "key", None) != key:
+        get_connection()  # creates the database file and switches it to WAL
+        # check_same_thread=False only so close_connection can close it from another thread
+        conn = sqlite3.connect(f"file:{key[0]}?mode=ro", uri=True, cached_statements=256, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # journal_mode is a property of the file and can't be set read-only
+        _apply_pragmas(conn, _PRAGMAS[1:])
+        with _lock:
+            _all_readers.append(conn)
+        _readers.conn = conn
+        _readers.key = key
+    yield conn
 
 def execute(sql: str, params: Sequence[Any] | None = None) -> List[Dict[str, Any]]:
     """Execute SQL and return results as list of dicts"""
     start_time = time.time()
-    conn = get_connection()
     
     try:
-        cursor = conn.cursor()
-        cursor.execute(sql, params or [])
-        
         if sql.strip().upper().startswith('SELECT'):
-            rows = cursor.fetchall()
+            with get_read_conn() as conn:
+                rows = conn.execute(sql, params or []).fetchall()
             # Convert sqlite3.Row objects to dictionaries
             result = [dict(row) for row in rows]
         else:
-            conn.commit()
+            with _lock:
+                conn = get_connection()
+                conn.execute(sql, params or [])
+                conn.commit()
+                _bump_write_generation()
             result = []
         
         # Log slow queries (>100ms)
@@ -77,7 +157,6 @@ def execute(sql: str, params: Sequence[Any] | None = None) -> List[Dict[str, Any
         )
         raise
 
-# Async wrapper to maintain compatibility with existing code
 async def execute_async(sql: str, params: Sequence[Any] | None = None) -> List[Dict[str, Any]]:
-    """Async wrapper for execute function"""
-    return execute(sql, params)
\ No newline at end of file
+    """Run execute in a worker thread so async handlers don't block the event loop"""
+    return await asyncio.to_thread(execute, sql, params)
\ No newline at end of file
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from enum import Enum
 
-from .deps import execute as execute_query
+from .deps import execute as execute_query, execute_insert, execute_many
 from .compliance_analyzer import ComplianceAnalyzer
 
 logger = logging.getLogger(__name__)
@@ -47,7 +47,10 @@ class WorkflowEngine:
     
     async def create_workflow_instance(self, template_id: int, trigger_data: Dict[str, Any], 
                                      context_data: Dict[str, Any], assigned_to: str = None) -> int:
-        """Create a new workflow instance from a template"""
+        """Create a new workflow instance from a template.
+
+        If ``context_data`` carries an ``instance_id`` key it is filled in with the new id.
+        """
         
         # Get template details
         template_query = """
@@ -63,14 +66,14 @@ class WorkflowEngine:
         template = template_result[0]
         steps = json.loads(template['steps'])
         
-        # Create workflow instance
+        # Create workflow instance; the id comes back with the INSERT itself
         instance_query = """
         INSERT INTO workflow_instances 
         (template_id, name, trigger_data, context_data, total_steps, assigned_to)
         VALUES (%s, %s, %s, %s, %s, %s)
         """
         
-        await execute_query(instance_query, (
+        instance_id = await execute_insert(instance_query, (
             template_id,
             template['name'],
             json.dumps(trigger_data),
@@ -79,24 +82,28 @@ class WorkflowEngine:
             assigned_to
         ))
         
-        # Get the instance ID
-        instance_id_result = await execute_query("SELECT LAST_INSERT_ID() as id")
-        instance_id = instance_id_result[0]['id']
+        if "instance_id" in context_data:
+            await execute_query(
+                "UPDATE workflow_instances SET context_data = JSON_SET(context_data, '$.instance_id', %s) WHERE id = %s",
+                (instance_id, instance_id)
+            )
         
-        # Create step executions
-        for step in steps:
-            step_query = """
-            INSERT INTO workflow_step_executions 
-            (instance_id, step_number, step_name, step_type, input_data)
-            VALUES (%s, %s, %s, %s, %s)
-            """
-            await execute_query(step_query, (
+        # Create step executions in one batched INSERT
+        step_query = """
+        INSERT INTO workflow_step_executions 
+        (instance_id, step_number, step_name, step_type, input_data)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+        await execute_many(step_query, [
+            (
                 instance_id,
                 step['id'],
                 step['name'],
                 step['type'],
                 json.dumps(step.get('config', {}))
-            ))
+            )
+            for step in steps
+        ])
         
         logger.info(f"Created workflow instance {instance_id} from template {template_id}")
         return instance_id
@@ -24,5 +24,11 @@ with conn.cursor() as cur:
             print(f"cleared {t}")
         except Exception as e:
             print(f"{t}: {e}")
+    # /documents reads chunk stats from documents_meta; reset them with the chunks
+    try:
+        cur.execute("UPDATE documents_meta SET chunks = 0, first_seen = NULL, last_seen = NULL")
+        print("reset documents_meta chunk stats")
+    except Exception as e:
+        print(f"documents_meta: {e}")
 conn.close()
 print("done.")
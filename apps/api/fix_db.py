@@ -91,7 +91,11 @@ async def fix_database():
                 display_name VARCHAR(255),
                 description TEXT,
                 resolved BOOLEAN DEFAULT FALSE,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                chunks INT NOT NULL DEFAULT 0,
+                first_seen TIMESTAMP NULL,
+                last_seen TIMESTAMP NULL,
+                KEY idx_documents_meta_last_seen (last_seen)
             )
         """)
         
@@ -8,11 +8,11 @@ import os
 import sys
 from pathlib import Path
 
-def setup_sqlite_db():
+def setup_sqlite_db(db_path=None):
     """Create SQLite database with required tables"""
     try:
-        # Create database file in the API directory
-        db_path = Path(__file__).parent / "lexmind.db"
+        # Create database file in the API directory unless a path is given
+        db_path = Path(db_path) if db_path else Path(__file__).parent / "lexmind.db"
         print(f"Creating SQLite database at: {db_path}")
         
         conn = sqlite3.connect(str(db_path))
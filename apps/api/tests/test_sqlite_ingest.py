@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from sqlite_setup import setup_sqlite_db
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """SQLite-mode app backed by a fresh database created by sqlite_setup.py"""
+    db_path = tmp_path / "lexmind.db"
+    assert setup_sqlite_db(db_path)
+    monkeypatch.setenv("TIDB_DATABASE", str(db_path))
+
+    from app import sqlite_deps
+    from app.main_sqlite import app
+
+    sqlite_deps.close_connection()
+    with TestClient(app) as test_client:
+        yield test_client
+    sqlite_deps.close_connection()
+
+
+def test_ingest_doc_inserts_then_updates_chunk(client):
+    item = {"path": "policies/privacy.txt", "chunk_idx": 0, "content": "Personal data is encrypted at rest."}
+    assert client.post("/ingest/doc", json=item).status_code == 200
+
+    item["content"] = "Personal data is encrypted at rest and in transit."
+    assert client.post("/ingest/doc", json=item).status_code == 200
+
+    documents = client.get("/documents").json()["documents"]
+    assert [(d["path"], d["chunks"]) for d in documents] == [("policies/privacy.txt", 1)]
+
+
+def test_ingest_reg_rejects_duplicate(client):
+    item = {"source": "eu", "title": "GDPR", "section": "Art 5", "text": "Principles relating to processing of personal data."}
+    assert client.post("/ingest/reg", json=item).status_code == 200
+    assert client.post("/ingest/reg", json=item).status_code == 409
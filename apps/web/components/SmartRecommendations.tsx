@@ -121,9 +121,9 @@ export default function SmartRecommendations() {
       
       const params = new URLSearchParams({
         limit: '15',
-        ...(selectedTypes.length > 0 && { types: selectedTypes.join(',') }),
         ...(contextDocumentId && { context_document_id: contextDocumentId })
       });
+      selectedTypes.forEach(type => params.append('types', type));
       
       const response = await api.get<RecommendationsResponse>(`/recommendations?${params}`);
       
@@ -0,0 +1,8 @@
+USE lexmind;
+
+-- Covering index for /recommendations/analytics
+-- The analytics query range-scans generated_at and only reads the columns below,
+-- so TiDB/MySQL can answer it from the index without touching table rows
+-- (no INCLUDE clause here, so the payload columns are part of the key).
+CREATE INDEX IF NOT EXISTS idx_doc_rec_analytics
+    ON document_recommendations(generated_at, recommendation_type, user_id, clicked_at, feedback_rating);
@@ -0,0 +1,20 @@
+USE lexmind;
+
+-- Per-path chunk statistics for /documents, maintained by the ingest endpoints
+-- so the listing no longer aggregates corp_docs on every request.
+ALTER TABLE documents_meta
+  ADD COLUMN IF NOT EXISTS chunks INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS first_seen TIMESTAMP NULL,
+  ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP NULL;
+
+CREATE INDEX IF NOT EXISTS idx_documents_meta_last_seen ON documents_meta(last_seen);
+
+-- Backfill from existing chunks (idempotent: recomputes the same values on re-run)
+INSERT INTO documents_meta (path, chunks, first_seen, last_seen)
+SELECT path, COUNT(*), MIN(created_at), MAX(created_at)
+FROM corp_docs
+GROUP BY path
+ON DUPLICATE KEY UPDATE
+  chunks = VALUES(chunks),
+  first_seen = VALUES(first_seen),
+  last_seen = VALUES(last_seen);
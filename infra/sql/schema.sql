@@ -24,7 +24,11 @@ CREATE TABLE IF NOT EXISTS documents_meta (
   path VARCHAR(512) PRIMARY KEY,
   display_name VARCHAR(255),
   description TEXT,
-  resolved BOOLEAN DEFAULT FALSE
+  resolved BOOLEAN DEFAULT FALSE,
+  chunks INT NOT NULL DEFAULT 0,
+  first_seen TIMESTAMP NULL,
+  last_seen TIMESTAMP NULL,
+  KEY idx_documents_meta_last_seen (last_seen)
 );
 
 CREATE TABLE IF NOT EXISTS mappings (